@@ -66,7 +66,11 @@ class Polynomial[T]:
     def __mul__(self, other):
         if not isinstance(other, Polynomial):
             return Polynomial(*map(lambda x: other * x, self.coefficients), default=self.default)
-        return sum([(self * other[i]) << i for i in range(len(other.coefficients))], start=Polynomial(self.default, default=self.default))
+        product = [self.default] * (len(self.coefficients) + len(other.coefficients) - 1)
+        for j, y in enumerate(other.coefficients):
+            for i, x in enumerate(self.coefficients):
+                product[i + j] = product[i + j] + y * x
+        return Polynomial(*product, default=self.default)
 
     def __rmul__(self, other):
         return self * other
@@ -0,0 +1,191 @@
+from fractions import Fraction
+
+import numpy as np
+
+from transducer_viewer import MyGraph
+
+
+def _arcs(dfa: MyGraph) -> tuple[np.ndarray, np.ndarray]:
+    """
+Tails and heads of every arc of the DFA by node index, keeping repeated arcs. Node 0 is the initial state, as make_dfa adds it first.
+    """
+    ids = {node: i for i, node in enumerate(dfa.graph)}
+    arcs = [(ids[tail], ids[head]) for tail in dfa.graph for _, head in dfa.graph[tail]]
+    return np.array([t for t, _ in arcs], dtype=np.int64), np.array([h for _, h in arcs], dtype=np.int64)
+
+
+def count_sequence(dfa: MyGraph, length: int, modulus: int | None = None) -> list[int]:
+    """
+Counts the paths from the initial state of each length 0..length - 1, by sparse vector-matrix iteration.
+Counts mod a small enough modulus stay in int64, and otherwise are exact Python integers.
+    :param modulus: reduce the counts mod this, if given
+    :return: number of paths of each length
+    """
+    tails, heads = _arcs(dfa)
+    size = len(dfa.graph)
+    dtype = np.int64 if modulus is not None and modulus * (len(tails) + size) < 2 ** 63 else object
+    vector = np.zeros(size, dtype=dtype)
+    vector[0] = 1
+    counts = []
+    for _ in range(length):
+        total = int(vector.sum())
+        counts.append(total % modulus if modulus is not None else total)
+        following = np.zeros(size, dtype=dtype)
+        np.add.at(following, heads, vector[tails])
+        if modulus is not None:
+            following %= modulus
+        vector = following
+    return counts
+
+
+def berlekamp_massey(sequence: list[int], modulus: int | None = None) -> list[int]:
+    """
+Finds the shortest linear recurrence s_n = a_1 s_(n-1) + ... + a_L s_(n-L) satisfied by the sequence, over the rationals or mod a prime.
+    :param modulus: prime to work mod, if given
+    :return: a_1, ..., a_L, which must be integers when working over the rationals
+    """
+    def divide(x, y):
+        return x * pow(y, -1, modulus) % modulus if modulus is not None else Fraction(x) / y
+
+    c = [1]
+    b = [1]
+    length, shift, last = 0, 1, 1
+    for n, s in enumerate(sequence):
+        discrepancy = s + sum(c[i] * sequence[n - i] for i in range(1, length + 1))
+        if modulus is not None:
+            discrepancy %= modulus
+        if discrepancy == 0:
+            shift += 1
+            continue
+        previous = c[:]
+        scale = divide(discrepancy, last)
+        c += [0] * (len(b) + shift - len(c))
+        for i, x in enumerate(b):
+            c[i + shift] = (c[i + shift] - scale * x) % modulus if modulus is not None else c[i + shift] - scale * x
+        if 2 * length <= n:
+            length, b, last, shift = n + 1 - length, previous, discrepancy, 1
+        else:
+            shift += 1
+    coefficients = [-x for x in c[1:length + 1]] + [0] * (length + 1 - len(c))
+    if modulus is not None:
+        return [x % modulus for x in coefficients]
+    assert all(Fraction(x).denominator == 1 for x in coefficients)
+    return [int(x) for x in coefficients]
+
+
+def _primes(start: int = 2 ** 31):
+    """
+Primes below start, in decreasing order.
+    """
+    n = start - 1
+    while n > 2:
+        # Deterministic Miller-Rabin below 3.4 * 10^14
+        d, r = n - 1, 0
+        while d % 2 == 0:
+            d //= 2
+            r += 1
+        for a in (2, 3, 5, 7, 11, 13, 17):
+            x = pow(a, d, n)
+            if x in (1, n - 1) or a % n == 0:
+                continue
+            for _ in range(r - 1):
+                x = x * x % n
+                if x == n - 1:
+                    break
+            else:
+                break
+        else:
+            yield n
+        n -= 2 if n % 2 == 1 else 1
+
+
+def path_recurrence(dfa: MyGraph) -> tuple[list[int], list[int]]:
+    """
+The linear recurrence followed by the path counts of a DFA, which has at most as many terms as the DFA has states m.
+Its coefficients are integers, as it divides the characteristic polynomial of the adjacency matrix, so they are found from the first 2m counts mod
+several primes and combined by the Chinese remainder theorem until they stop changing, then checked mod one more prime and finally over the integers.
+    :return: recurrence coefficients a_1, ..., a_L and initial counts s_0, ..., s_(L-1)
+    """
+    def satisfies(recurrence: list[int], counts: list[int], prime: int | None = None) -> bool:
+        residues = (sum(a * counts[n - i] for i, a in enumerate(recurrence, start=1)) - counts[n] for n in range(len(recurrence), terms))
+        return all((r % prime if prime is not None else r) == 0 for r in residues)
+
+    terms = 2 * len(dfa.graph)
+    length = -1
+    residues: list[int] = []
+    modulus = 1
+    previous: list[int] | None = None
+    stable = False
+    exact: list[int] | None = None
+    for prime in _primes():
+        counts = count_sequence(dfa, terms, prime)
+        if stable and satisfies(previous, counts, prime):
+            if exact is None:
+                exact = count_sequence(dfa, terms)
+            if satisfies(previous, exact):
+                return previous, exact[:len(previous)]
+        recurrence = berlekamp_massey(counts, prime)
+        if len(recurrence) < length:
+            # The recurrence can only get shorter mod a prime
+            continue
+        if len(recurrence) > length:
+            length, residues, modulus, previous = len(recurrence), [0] * len(recurrence), 1, None
+        residues = [x + modulus * ((a - x) * pow(modulus, -1, prime) % prime) for x, a in zip(residues, recurrence)]
+        modulus *= prime
+        lifted = [x if 2 * x < modulus else x - modulus for x in residues]
+        stable = lifted == previous
+        previous = lifted
+    raise ArithmeticError
+
+
+def _multiply_mod(lhs: list[int], rhs: list[int], recurrence: list[int], modulus: int | None) -> list[int]:
+    """
+Multiplies two polynomials modulo x^L - a_1 x^(L-1) - ... - a_L.
+    """
+    size = len(recurrence)
+    product = [0] * (2 * size - 1)
+    for i, x in enumerate(lhs):
+        if x:
+            for j, y in enumerate(rhs):
+                product[i + j] += x * y
+    for k in range(2 * size - 2, size - 1, -1):
+        top = product[k]
+        if top:
+            for i, a in enumerate(recurrence, start=1):
+                product[k - i] += top * a
+    result = product[:size]
+    return [x % modulus for x in result] if modulus is not None else result
+
+
+def count_paths(dfa: MyGraph, n: int, modulus: int | None = None, recurrence: tuple[list[int], list[int]] | None = None) -> int:
+    """
+Counts the paths of length n from the initial state, which is the number of attractor cylinders at depth n.
+Small n are counted directly. Larger n use the linear recurrence of the counts, finding x^n modulo its polynomial by repeated squaring.
+    :param n: length of the paths
+    :param modulus: reduce the count mod this, if given
+    :param recurrence: the result of path_recurrence, to reuse it between calls
+    :return: exact number of paths, or the number mod modulus
+    """
+    assert n >= 0
+    if recurrence is None and n < 4 * len(dfa.graph):
+        return count_sequence(dfa, n + 1, modulus)[n]
+    coefficients, initial = recurrence if recurrence is not None else path_recurrence(dfa)
+    size = len(coefficients)
+    if size == 0:
+        return 0
+    if n < size:
+        return initial[n] % modulus if modulus is not None else initial[n]
+    if modulus is not None:
+        coefficients = [a % modulus for a in coefficients]
+
+    # x^n mod the recurrence polynomial, by squaring
+    result = [1] + [0] * (size - 1)
+    power = [0, 1] + [0] * (size - 2) if size > 1 else [coefficients[0]]
+    while n > 0:
+        if n & 1:
+            result = _multiply_mod(result, power, coefficients, modulus)
+        n >>= 1
+        if n > 0:
+            power = _multiply_mod(power, power, coefficients, modulus)
+    total = sum(r * s for r, s in zip(result, initial))
+    return total % modulus if modulus is not None else total
@@ -1,13 +1,20 @@
 from idlelib.pyparse import trans
+from typing import Callable
 
 import p_adic as pa
 import p_adic_IFS as pIFS
+import perron
 import transducer_viewer as tv
 from p_adic_IFS import Transducer
 
-with open('functions.txt', 'r+t') as f:
-    lines = f.readlines()
 
+def read_definition(lines: list[str], to_p_adic: Callable[..., pa.pAdic] = pa.pAdic.to_p_adic) -> tuple[str, pIFS.Transducer]:
+    """
+Reads an IFS in the format of functions.txt.
+    :param lines: lines of the definition
+    :param to_p_adic: conversion used for the constants
+    :return: mode, transducer
+    """
     # Line 1 defines the p
     p_definition_line = lines[0]
     if not p_definition_line.startswith("p:"):
@@ -36,24 +43,41 @@ with open('functions.txt', 'r+t') as f:
         a_i = int(numerator) if numerator != '' else 0
         denominator = denominator.strip()
         b_i = int(denominator) if denominator != '' else 1
-        this_function = pIFS.pAdicFunction(p, function_name, pa.pAdic.to_p_adic(p, a_i, b_i), k_i, e_i)
+        this_function = pIFS.pAdicFunction(p, function_name, to_p_adic(p, a_i, b_i), k_i, e_i)
         function_list.append(this_function)
     transducer: pIFS.Transducer = pIFS.Transducer(p, (pa.pAdic.zero(p), 1), *function_list)
+    return lines[1].strip().upper(), transducer
 
-    # Line 2 decides what to do:
-    if lines[1].strip().upper() == 'DFA':
-        print(tv.make_dfa(transducer).to_graphviz())
-    elif lines[1].strip().upper() == 'NDFA':
-        tv.make_ndfa(transducer)
-    elif lines[1].strip().upper() == 'A':
-        print(tv.make_dfa(transducer).adjacency_matrix())
-    elif lines[1].strip().upper() == 'DIMENSION':
-        print(tv.hausdorff_dimension(transducer))
-    elif lines[1].strip().upper() == 'SIMPLIFY':
+
+def run_mode(mode: str, transducer: pIFS.Transducer, make_dfa: Callable[[pIFS.Transducer], tv.MyGraph] = tv.make_dfa) -> str:
+    """
+Runs one of the modes on a transducer.
+    :param make_dfa: builds the DFA of a transducer, e.g. from a cache
+    :return: the output of the mode
+    """
+    if mode == 'DFA':
+        return str(make_dfa(transducer).to_graphviz())
+    elif mode == 'NDFA':
+        return tv.ndfa_graphs(transducer)[0].source
+    elif mode == 'A':
+        return str(make_dfa(transducer).adjacency_matrix())
+    elif mode == 'DIMENSION':
+        return str(tv.hausdorff_dimension(transducer, make_dfa(transducer)))
+    elif mode == 'CERTIFIED':
+        lower, upper = perron.certified_dimension(transducer, dfa=make_dfa(transducer))
+        return f'{lower} <= Hausdorff Dimension <= {upper}'
+    elif mode == 'SIMPLIFY':
         simple_t = transducer.simplify()
-        print(simple_t.functions)
-        print(f'Hausdorff Dimension: {tv.hausdorff_dimension(simple_t)}')
-        print(f'DFA:')
-        print(tv.make_dfa(simple_t).to_graphviz())
+        dfa = make_dfa(simple_t)
+        return '\n'.join([str(simple_t.functions), f'Hausdorff Dimension: {tv.hausdorff_dimension(simple_t, dfa)}', f'DFA:', str(dfa.to_graphviz())])
     else:
-        print(tv.view_transducer(transducer))
\ No newline at end of file
+        return str(tv.view_transducer(transducer))
+
+
+if __name__ == '__main__':
+    with open('functions.txt', 'r+t') as f:
+        lines = f.readlines()
+
+        # Line 2 decides what to do:
+        mode, transducer = read_definition(lines)
+        print(run_mode(mode, transducer))
@@ -0,0 +1,198 @@
+import argparse
+import asyncio
+import os
+import signal
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Any
+
+import p_adic as pa
+import p_adic_IFS as pIFS
+import transducer_viewer as tv
+from pIFS_reader import read_definition, run_mode
+
+
+class LRUCache:
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self.items: OrderedDict[Any, Any] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        if key not in self.items:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self.items.move_to_end(key)
+        return self.items[key]
+
+    def put(self, key, value):
+        self.items[key] = value
+        self.items.move_to_end(key)
+        while len(self.items) > self.maxsize:
+            self.items.popitem(last=False)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __repr__(self):
+        return f"{len(self.items)}/{self.maxsize} entries, {self.hits} hits, {self.misses} misses"
+
+
+# Caches kept by each worker process between requests
+_to_p_adic = lru_cache(maxsize=4096)(pa.pAdic.to_p_adic)
+_transducers = LRUCache(64)
+_dfas = LRUCache(64)
+
+
+def _system_key(transducer: pIFS.Transducer):
+    return transducer.p, transducer.i, tuple((f.name, f.d.to_rational(), f.k, f.sign) for f in transducer.functions)
+
+
+def _cached_dfa(transducer: pIFS.Transducer) -> tv.MyGraph:
+    key = _system_key(transducer)
+    dfa = _dfas.get(key)
+    if dfa is None:
+        dfa = tv.make_dfa(transducer)
+        _dfas.put(key, dfa)
+    return dfa
+
+
+def handle(definition: str) -> str:
+    """
+Runs a definition in the format of functions.txt, reusing conversions, explored transducers and DFAs from earlier requests to this process.
+    """
+    mode, transducer = read_definition(definition.splitlines(keepends=True), _to_p_adic)
+    key = _system_key(transducer)
+    cached = _transducers.get(key)
+    if cached is None:
+        _transducers.put(key, transducer)
+    else:
+        transducer = cached
+    return run_mode(mode, transducer, _cached_dfa)
+
+
+class AnalysisServer:
+    def __init__(self, workers: int | None = None, max_concurrent: int | None = None, cache_size: int = 256):
+        """
+Local HTTP service running the pIFS_reader modes on a process pool, so imports and caches stay warm between requests.
+POST /run with a functions.txt definition as the body returns the output of its mode. An X-Request-Id header lets POST /cancel/<id> cancel it,
+as does the connection being lost. A client may half close its side once the request is sent. A request already running in a worker is finished there,
+but its result is dropped. GET /stats reports the cache.
+SIGTERM stops the server and its workers.
+        :param workers: number of worker processes, all available cores if None
+        :param max_concurrent: number of requests run at once, the number of workers if None
+        :param cache_size: number of results kept
+        """
+        self.workers = workers if workers is not None else os.cpu_count()
+        self.executor = ProcessPoolExecutor(self.workers)
+        self.limit = asyncio.Semaphore(max_concurrent if max_concurrent is not None else self.workers)
+        self.results = LRUCache(cache_size)
+        self.running: dict[str, asyncio.Task] = {}
+        self.server: asyncio.Server | None = None
+
+    async def run(self, definition: str) -> str:
+        result = self.results.get(definition)
+        if result is not None:
+            return result
+        async with self.limit:
+            result = await asyncio.get_running_loop().run_in_executor(self.executor, handle, definition)
+        self.results.put(definition, result)
+        return result
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: str, body: str):
+        data = body.encode()
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Type: text/plain; charset=utf-8\r\nContent-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode() + data)
+        await writer.drain()
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            method, path, _ = (await reader.readline()).decode().split(' ', 2)
+            headers: dict[str, str] = {}
+            while (line := (await reader.readline()).decode().strip()) != '':
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+            body = (await reader.readexactly(int(headers.get('content-length', 0)))).decode()
+
+            if method == 'GET' and path == '/stats':
+                await self._respond(writer, '200 OK', f"results: {self.results}\nrunning: {len(self.running)}\n")
+            elif method == 'POST' and path.startswith('/cancel/'):
+                task = self.running.get(path.removeprefix('/cancel/'))
+                if task is None:
+                    await self._respond(writer, '404 Not Found', 'No such request\n')
+                else:
+                    task.cancel()
+                    await self._respond(writer, '200 OK', 'Cancelled\n')
+            elif method == 'POST' and path == '/run':
+                await self._run_request(writer, body, headers.get('x-request-id'))
+            else:
+                await self._respond(writer, '404 Not Found', 'Unknown endpoint\n')
+        except (ValueError, asyncio.IncompleteReadError) as e:
+            await self._respond(writer, '400 Bad Request', f'{e}\n')
+        finally:
+            writer.close()
+
+    async def _run_request(self, writer: asyncio.StreamWriter, definition: str, request_id: str | None, poll_interval: float = 0.5):
+        task = asyncio.create_task(self.run(definition))
+        if request_id is not None:
+            self.running[request_id] = task
+        try:
+            # End of input is not a disconnect, as the client may only have shut down its side
+            while not task.done():
+                await asyncio.wait({task}, timeout=poll_interval)
+                if writer.is_closing():
+                    task.cancel()
+                    return
+            try:
+                await self._respond(writer, '200 OK', task.result() + '\n')
+            except asyncio.CancelledError:
+                await self._respond(writer, '409 Conflict', 'Cancelled\n')
+            except (LookupError, ValueError, AssertionError) as e:
+                await self._respond(writer, '400 Bad Request', f'{e!r}\n')
+            except Exception as e:
+                await self._respond(writer, '500 Internal Server Error', f'{e!r}\n')
+        finally:
+            if request_id is not None:
+                self.running.pop(request_id, None)
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 8765, socket_path: str | None = None):
+        """
+Listens on localhost, or on a Unix socket if socket_path is given, until cancelled or sent SIGTERM.
+The workers are started first, as forked workers would otherwise inherit the listening and client sockets and keep them open.
+        """
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, os.getpid) for _ in range(self.workers)))
+        if socket_path is not None:
+            self.server = await asyncio.start_unix_server(self.handle_connection, socket_path)
+        else:
+            self.server = await asyncio.start_server(self.handle_connection, host, port)
+        try:
+            async with self.server:
+                serving = asyncio.create_task(self.server.serve_forever())
+                loop.add_signal_handler(signal.SIGTERM, serving.cancel)
+                try:
+                    await asyncio.wait({serving})
+                finally:
+                    loop.remove_signal_handler(signal.SIGTERM)
+                    serving.cancel()
+        finally:
+            self.executor.shutdown(cancel_futures=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve the pIFS_reader modes over HTTP.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--socket', help='Unix socket to listen on instead of host and port')
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--max-concurrent', type=int)
+    parser.add_argument('--cache-size', type=int, default=256)
+    args = parser.parse_args()
+
+    async def main():
+        await AnalysisServer(args.workers, args.max_concurrent, args.cache_size).serve(args.host, args.port, args.socket)
+
+    asyncio.run(main())
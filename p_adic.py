@@ -6,6 +6,7 @@ from itertools import batched
 class pAdic:
     digits: tuple[tuple, tuple, tuple]
     precision_tolerance = 1e-6
+    _orders: dict[int, dict[int, int]] = {}
 
     def __init__(self, p, repeating_digits: tuple = (0,), whole_part: tuple = tuple(), frac_part: tuple = tuple()):
         """
@@ -70,45 +71,13 @@ Returns a readable version of the p-adic number after simplification.
     @staticmethod
     def to_p_adic(p, num: int, denom: int = 1):
         """
-Converts a given rational number to a p-adic.
+Converts a given rational number to a p-adic, through from_rational.
         :param p: Must be a prime number
         :param num: Must be an integer
         :param denom: Must be a non-zero integer
         :return: pAdic number
         """
-        assert denom != 0
-        if num == 0:
-            return pAdic.zero(p)
-        available_digits = list(range(p))
-        n_0 = pAdic.p_adic_valuation(num, denom, p)
-
-        # shift over if not a p-adic integer
-        if n_0 < 0:
-            denom *= p ** n_0
-
-        # this allows for the repeating structure to be captured
-        visited: dict[int, int] = {}
-        place_value = min(0, n_0)
-        digits: dict[int, int] = {}
-        a = num
-        highest_index = 0
-        while a not in visited:
-            for digit in available_digits:
-                if (a - digit * denom) % p != 0:
-                    continue
-                digits[place_value] = digit
-                if place_value >= 0:
-                    visited[a] = place_value
-                    highest_index += 1
-                a = (a - digit * denom) // p
-                break
-            place_value += 1
-
-        # separate it into the component parts
-        fractional_part = tuple([digits[j] for j in range(-1, n_0 - 1, -1)])
-        aperiodic_part = tuple([digits[j] for j in range(visited[a] - 1, -1, -1)])
-        periodic_part = tuple([digits[j] for j in range(highest_index - 1, visited[a] - 1, -1)])
-        return pAdic(p, periodic_part, aperiodic_part, fractional_part)
+        return pAdic.from_rational(p, num, denom)
 
     @staticmethod
     def _loop_over(x, amount=1):
@@ -163,6 +132,7 @@ Converts a given rational number to a p-adic.
     def __add__(self, other):
         """
 Adds together two p-adic numbers, for the same p.
+The sum is found as a rational, then expanded with a period known in advance from the multiplicative order of p, so no padding to a common period is needed.
         :param other: p-adic number
         :return: p-adic number
         """
@@ -172,58 +142,84 @@ Adds together two p-adic numbers, for the same p.
         # Cannot add incompatible p-adic numbers
         if self.p != other.p:
             raise ValueError
-        p = self.p
+        lhs_num, lhs_denom = self._rational_part()
+        rhs_num, rhs_denom = other._rational_part()
+        return pAdic.from_rational(self.p, lhs_num * rhs_denom + rhs_num * lhs_denom, lhs_denom * rhs_denom)
+
+    def _rational_part(self) -> tuple[int, int]:
+        if len(self.digits[0]) == 0:
+            return pAdic(self.p, (0,), self.digits[1], self.digits[2]).to_rational()
+        return self.to_rational()
+
+    @staticmethod
+    def _factorise(n: int) -> dict[int, int]:
+        factors: dict[int, int] = {}
+        q = 2
+        while q * q <= n:
+            while n % q == 0:
+                factors[q] = factors.get(q, 0) + 1
+                n //= q
+            q += 1
+        if n > 1:
+            factors[n] = factors.get(n, 0) + 1
+        return factors
+
+    @staticmethod
+    def multiplicative_order(p, denom: int) -> int:
+        """
+The order of p modulo denom, which is the period of every p-adic with reduced denominator denom. Cached for each p.
+        :param p: Must be a prime number
+        :param denom: Must be a positive integer coprime to p
+        """
+        table = pAdic._orders.setdefault(p, {})
+        if denom not in table:
+            # The order divides the Carmichael function of denom
+            order = 1
+            for q, e in pAdic._factorise(denom).items():
+                order = lcm(order, 2 ** (e - 2) if q == 2 and e > 2 else q ** (e - 1) * (q - 1))
+            for q in pAdic._factorise(order):
+                while order % q == 0 and pow(p, order // q, denom) == 1 % denom:
+                    order //= q
+            table[denom] = order
+        return table[denom]
 
-        lhs_periodic_part, lhs_aperiodic_part, lhs_fractional_part = self.digits
-        if lhs_periodic_part == tuple():
-            lhs_periodic_part = (0,)
-
-        rhs_periodic_part, rhs_aperiodic_part, rhs_fractional_part = other.digits
-        if rhs_periodic_part == tuple():
-            rhs_periodic_part = (0,)
-
-        # Need periodic parts to be of common size
-        common_period = lcm(len(lhs_periodic_part), len(rhs_periodic_part))
-        lhs_periodic_part *= common_period // len(lhs_periodic_part)
-        rhs_periodic_part *= common_period // len(rhs_periodic_part)
-
-        # Need aperiodic parts to be of common size
-        delay_of_period = max(len(lhs_aperiodic_part), len(rhs_aperiodic_part))
-        l_difference, r_difference = delay_of_period - len(lhs_aperiodic_part), delay_of_period - len(
-            rhs_aperiodic_part)
-        if l_difference > 0:
-            lhs_periodic_part, lhs_aperiodic_part = pAdic._spew(lhs_periodic_part, lhs_aperiodic_part,
-                                                                l_difference + common_period)
-        if r_difference > 0:
-            rhs_periodic_part, rhs_aperiodic_part = pAdic._spew(rhs_periodic_part, rhs_aperiodic_part,
-                                                                r_difference + common_period)
-        lhs_aperiodic_part = tuple(list(lhs_periodic_part) + list(lhs_aperiodic_part))
-        rhs_aperiodic_part = tuple(list(rhs_periodic_part) + list(rhs_aperiodic_part))
-
-        # Need fractional parts to be of common size
-        if len(lhs_fractional_part) < len(rhs_fractional_part):
-            difference = len(rhs_fractional_part) - len(lhs_fractional_part)
-            lhs_fractional_part = tuple(list(lhs_fractional_part) + [0] * difference)
-        elif len(rhs_fractional_part) < len(lhs_fractional_part):
-            difference = len(lhs_fractional_part) - len(rhs_fractional_part)
-            rhs_fractional_part = tuple(list(rhs_fractional_part) + [0] * difference)
-
-        # Add with carrying
-        frac_list = []
-        carry = 0
-        for a, b in zip(reversed(lhs_fractional_part), reversed(rhs_fractional_part)):
-            carry, c = divmod(a + b + carry, p)
-            frac_list.append(c)
-        aper_list = []
-        for a, b in zip(reversed(lhs_aperiodic_part), reversed(rhs_aperiodic_part)):
-            carry, c = divmod(a + b + carry, p)
-            aper_list.append(c)
-        periodic_list = []
-        for a, b in zip(reversed(lhs_periodic_part), reversed(rhs_periodic_part)):
-            carry, c = divmod(a + b + carry, p)
-            periodic_list.append(c)
-        return pAdic(p, tuple(reversed(periodic_list)), tuple(reversed(aper_list)),
-                     tuple(reversed(frac_list))).condense()
+    @staticmethod
+    def from_rational(p, num: int, denom: int = 1):
+        """
+Converts a rational number to a condensed p-adic, emitting only the digits of the pre-period and one period.
+        :param p: Must be a prime number
+        :param num: Must be an integer
+        :param denom: Must be a non-zero integer
+        :return: pAdic number
+        """
+        assert denom != 0
+        if denom < 0:
+            num, denom = -num, -denom
+        g = gcd(num, denom)
+        num //= g
+        denom //= g
+        # Fractional digits come from the power of p in the denominator
+        shift = 0
+        while denom % p == 0:
+            denom //= p
+            shift += 1
+        inverse = pow(denom, -1, p)
+
+        def next_digit():
+            nonlocal num
+            digit = num * inverse % p
+            num = (num - digit * denom) // p
+            return digit
+
+        fractional_part = [next_digit() for _ in range(shift)]
+        # Once num / denom lies in [-1, 0] the digits are purely periodic
+        aperiodic_part = []
+        while not -denom <= num <= 0:
+            aperiodic_part.append(next_digit())
+        periodic_part = [next_digit() for _ in range(pAdic.multiplicative_order(p, denom))]
+        while len(fractional_part) > 0 and fractional_part[0] == 0:
+            fractional_part = fractional_part[1:]
+        return pAdic(p, tuple(reversed(periodic_part)), tuple(reversed(aperiodic_part)), tuple(reversed(fractional_part)))
 
     def condense(self):
         """
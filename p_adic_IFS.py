@@ -2,10 +2,19 @@ from numpy.ma.extras import atleast_1d
 
 import p_adic as pa
 from math import lcm, gcd
+from fractions import Fraction
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import pickle
+import shelve
+import sys
 import typing as t
 
 type State = tuple[pa.pAdic, int]
 type Result = tuple[State, tuple]
+type CanonicalForm = tuple[int, tuple[tuple[int, int, int], ...]]
+type CompactState = tuple[tuple[tuple, tuple, tuple], int]
+type TransitionKey = tuple[int, tuple, int, int, tuple, int]
 
 
 class pAdicFunction:
@@ -36,7 +45,144 @@ def simplify_rational(num, denom):
     return num//g, denom//g
 
 
+def canonical_form(p, *functions: pAdicFunction) -> CanonicalForm:
+    """
+Gives a key shared by every IFS equivalent to this one: the same maps in any order or with any names, or conjugated by an affine change x -> ax + b.
+The fixed point of one map is moved to 0 and the translations scaled to coprime integers, taking the least result over every map and sign.
+    :param p: Must be a prime number
+    :param functions: maps of the IFS
+    :return: p, sorted (sign, k, d) for each map with d an integer
+    """
+    maps = [(f.sign, f.k, Fraction(*f.d.to_rational())) for f in functions]
+    candidates = []
+    for s_0, k_0, d_0 in maps:
+        b = d_0 / (s_0 * p ** k_0 - 1)
+        translated = [d + b * (1 - s * p ** k) for s, k, d in maps]
+        scale_factor = lcm(*[d.denominator for d in translated])
+        numerators = [d.numerator * scale_factor // d.denominator for d in translated]
+        g = gcd(*numerators) or 1
+        for sign in (1, -1):
+            candidates.append(tuple(sorted((s, k, sign * u // g) for (s, k, _), u in zip(maps, numerators))))
+    return p, min(candidates, default=tuple())
+
+
+class TransitionCache:
+    def __init__(self, maxsize: int = 1 << 16, policy: str = 'lru'):
+        """
+Remembers the results of apply_function by (p, d, k, sign, state), so transducers sharing a map do not recompute its transitions.
+        :param maxsize: number of transitions kept
+        :param policy: 'lru' to evict the least recently used transition, 'lfu' the least frequently used
+        """
+        assert policy == 'lru' or policy == 'lfu'
+        self.maxsize = maxsize
+        self.policy = policy
+        self.values: dict[TransitionKey, Result] = {}
+        # LRU order of keys, or the keys used each number of times in LRU order
+        self.order: OrderedDict[TransitionKey, None] = OrderedDict()
+        self.frequency: dict[TransitionKey, int] = {}
+        self.buckets: dict[int, OrderedDict[TransitionKey, None]] = {}
+        self.min_frequency = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(function: pAdicFunction, state: State) -> TransitionKey:
+        return function.p, function.d.digits, function.k, function.sign, state[0].digits, state[1]
+
+    def _touch(self, key: TransitionKey):
+        if self.policy == 'lru':
+            self.order.move_to_end(key)
+            return
+        f = self.frequency[key]
+        del self.buckets[f][key]
+        if len(self.buckets[f]) == 0:
+            del self.buckets[f]
+            if self.min_frequency == f:
+                self.min_frequency = f + 1
+        self.frequency[key] = f + 1
+        self.buckets.setdefault(f + 1, OrderedDict())[key] = None
+
+    def get(self, key: TransitionKey) -> Result | None:
+        if key in self.values:
+            self.hits += 1
+            self._touch(key)
+            return self.values[key]
+        self.misses += 1
+        return None
+
+    def put(self, key: TransitionKey, result: Result):
+        if key in self.values:
+            return
+        self._store(key, result)
+
+    def _store(self, key: TransitionKey, result: Result):
+        if self.maxsize <= 0:
+            return
+        if len(self.values) >= self.maxsize:
+            if self.policy == 'lru':
+                evicted, _ = self.order.popitem(last=False)
+            else:
+                evicted, _ = self.buckets[self.min_frequency].popitem(last=False)
+                if len(self.buckets[self.min_frequency]) == 0:
+                    del self.buckets[self.min_frequency]
+                del self.frequency[evicted]
+            del self.values[evicted]
+            self.evictions += 1
+        self.values[key] = result
+        if self.policy == 'lru':
+            self.order[key] = None
+        else:
+            self.frequency[key] = 1
+            self.buckets.setdefault(1, OrderedDict())[key] = None
+            self.min_frequency = 1
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+    def clear(self):
+        self.values.clear()
+        self.order.clear()
+        self.frequency.clear()
+        self.buckets.clear()
+        self.min_frequency = 0
+
+    def __len__(self):
+        return len(self.values)
+
+    def __repr__(self):
+        return f"{len(self.values)}/{self.maxsize} transitions ({self.policy}), hit rate {self.hit_rate():.1%}, {self.hits} hits, {self.misses} misses, {self.evictions} evictions"
+
+
+class ExplorationStats:
+    def __init__(self, state_bound: int | None = None):
+        """
+Progress of a bounded exploration, kept when the exploration is aborted.
+        :param state_bound: a priori bound on the number of states, None if there is none.
+        """
+        self.state_bound = state_bound
+        self.explored = 0
+        self.found = 0
+        self.transitions = 0
+        self.estimated_bytes = 0
+        self.complete = False
+        self.spill_path: str | None = None
+
+    def __repr__(self):
+        return f"explored {self.explored}/{self.found} states (bound {self.state_bound}), {self.transitions} transitions, ~{self.estimated_bytes} bytes{'' if self.complete else ', incomplete'}"
+
+
+class ExplorationLimitExceeded(Exception):
+    def __init__(self, stats: ExplorationStats):
+        super().__init__(f"Exploration aborted: {stats}")
+        self.stats = stats
+
+
 class Transducer:
+    # Largest state index create_transducer_bounded preallocates
+    _INDEX_SLOTS = 1 << 22
+
     def __init__(self, p, i: State, *functions: pAdicFunction):
         self.p = p
         self.functions = functions
@@ -54,6 +200,17 @@ class Transducer:
         f_tuples = [((u * scale_factor // v, 1), s, k, n) for (u, v), s, k, n in f_tuples]
         return Transducer(self.p, self.i, *(pAdicFunction(self.p, f[3], pa.pAdic.to_p_adic(self.p, *f[0]), f[2], '-' if f[1] == -1 else '+') for f in f_tuples))
 
+    def canonical_form(self) -> CanonicalForm:
+        return canonical_form(self.p, *self.functions)
+
+    @staticmethod
+    def from_canonical_form(key: CanonicalForm) -> 'Transducer':
+        """
+Builds the representative transducer of an equivalence class from its canonical form.
+        """
+        p, maps = key
+        return Transducer(p, (pa.pAdic.zero(p), 1), *(pAdicFunction(p, '', pa.pAdic.to_p_adic(p, d), k, '-' if s == -1 else '+') for s, k, d in maps))
+
     def shift(self, x: pa.pAdic, shift_count: int = 1) -> tuple[pa.pAdic, tuple]:
         d = tuple(x[i] for i in range(shift_count))
         pAdic_d = -pa.pAdic(self.p, whole_part=tuple(reversed(d)))
@@ -61,29 +218,273 @@ class Transducer:
         return s, d
 
     def apply_function(self, function: pAdicFunction, state: State) -> Result:
+        cache = transition_cache
+        if cache is None:
+            return self._transition(function, state)
+        key = TransitionCache.key(function, state)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+        result = self._transition(function, state)
+        cache.put(key, result)
+        return result
+
+    def _transition(self, function: pAdicFunction, state: State) -> Result:
         output: tuple
         next_state: State
         if state[1] == 1:
             next_state_part, output = self.shift(state[0] + function.d, function.k)
             next_state = (next_state_part, state[1] * function.sign)
         else:
-            next_state_part, output = self.shift(-(state[0] + function.d), function.k)
+            next_state_part, output = self.shift(state[0] - function.d, function.k)
             next_state = (next_state_part, state[1] * function.sign)
         return next_state, output
 
-    def find_all_from(self, state: State):
+    def find_all_from(self, state: State) -> list[State]:
+        """
+Finds the transitions from state for every function not already explored from it.
+        :return: the states seen for the first time
+        """
         assert state in self.states
+        found = []
         for f in self.functions:
+            if f in self.states[state]:
+                continue
             new_state, output = self.apply_function(f, state)
             if new_state not in self.nodes:
                 self.states[new_state] = {}
                 self.nodes.add(new_state)
+                found.append(new_state)
             self.states[state][f] = (new_state, output)
+        return found
 
     def create_transducer(self):
-        visited = set()
-        while visited != self.nodes:
-            m = self.nodes.difference(visited)
-            this_state = m.pop()
-            self.find_all_from(this_state)
-            visited.add(this_state)
+        unexplored = [state for state in self.nodes if len(self.states[state]) < len(self.functions)]
+        while len(unexplored) > 0:
+            this_state = unexplored.pop()
+            unexplored.extend(self.find_all_from(this_state))
+
+    def create_transducer_parallel(self, workers: int | None = None, batch_size: int = 256):
+        """
+Explores the same states as create_transducer, one breadth-first level at a time, sending batches of the level to a process pool.
+States are sent as their digit tuples and sign, and new states are deduplicated here between levels.
+        :param workers: number of processes, all available cores if None
+        :param batch_size: number of states sent to a process at once
+        """
+        assert batch_size > 0
+        frontier = [state for state in self.nodes if len(self.states[state]) < len(self.functions)]
+        if len(frontier) == 0:
+            return
+        with ProcessPoolExecutor(workers, initializer=_start_worker, initargs=(self.p, self.functions)) as executor:
+            while len(frontier) > 0:
+                batches = [frontier[j:j + batch_size] for j in range(0, len(frontier), batch_size)]
+                jobs = [[((state[0].digits, state[1]), tuple(i for i, f in enumerate(self.functions) if f not in self.states[state])) for state in batch] for batch in batches]
+                frontier = []
+                for batch, results in zip(batches, executor.map(_explore_batch, jobs)):
+                    for state, transitions in zip(batch, results):
+                        for i, (digits, sign), output in transitions:
+                            new_state = (pa.pAdic(self.p, *digits), sign)
+                            if new_state not in self.nodes:
+                                self.states[new_state] = {}
+                                self.nodes.add(new_state)
+                                frontier.append(new_state)
+                            self.states[state][self.functions[i]] = (new_state, output)
+
+    def state_bound(self) -> tuple[int, int] | None:
+        """
+Bounds the states reachable from i. Every state is (n/L, sign) with |n| <= N, as |x| <= M stays true under each map once M >= 1 + |d|/(p^k - 1).
+        :return: N, L. None if some d is not a p-adic integer, as the states are then unbounded.
+        """
+        rationals = [f.d.to_rational() for f in self.functions] + [self.i[0].to_rational()]
+        if any(v % self.p == 0 for _, v in rationals):
+            return None
+        denominator = lcm(*[v for _, v in rationals])
+        window = max([abs(Fraction(*self.i[0].to_rational()))] + [1 + abs(Fraction(*f.d.to_rational())) / (self.p ** f.k - 1) for f in self.functions])
+        return int(window * denominator), denominator
+
+    def create_transducer_bounded(self, max_states: int | None = None, max_bytes: int | None = None, spill_path: str | None = None) -> ExplorationStats:
+        """
+Explores like create_transducer, but aborts once more than max_states states are found or about max_bytes bytes are used.
+States are indexed by their place in the window from state_bound, preallocated when it is known and has at most _INDEX_SLOTS slots,
+at most 16 per state allowed by max_states and fits in half of max_bytes. Otherwise they are kept in a dict.
+On abort the partial transducer is kept, or written to spill_path and released, and ExplorationLimitExceeded is raised with the statistics so far.
+transition_cache is not used, as the states it holds would not be counted or released.
+The exploration can be resumed, after Transducer.load if spilled.
+        :return: statistics of the exploration
+        """
+        bound = self.state_bound()
+        stats = ExplorationStats(None if bound is None else 2 * (2 * bound[0] + 1))
+        index: list[State | None] | dict[State, State]
+        slots = stats.state_bound
+        if slots is not None and slots <= Transducer._INDEX_SLOTS and (max_states is None or slots <= 16 * max_states) and (max_bytes is None or 8 * slots <= max_bytes // 2):
+            numerator_bound, denominator = bound
+
+            def key(state: State) -> int:
+                u, v = state[0].to_rational()
+                n = u * (denominator // v)
+                assert denominator % v == 0 and abs(n) <= numerator_bound
+                return 2 * (n + numerator_bound) + (state[1] < 0)
+
+            index = [None] * slots
+            stats.estimated_bytes += sys.getsizeof(index)
+        else:
+            def key(state: State) -> State:
+                return state
+
+            index = {}
+        for state in self.nodes:
+            index[key(state)] = state
+            stats.estimated_bytes += Transducer._state_size(state)
+        stats.found = len(self.nodes)
+
+        unexplored = [state for state in self.nodes if len(self.states[state]) < len(self.functions)]
+        stats.explored = stats.found - len(unexplored)
+        while len(unexplored) > 0:
+            this_state = unexplored.pop()
+            for f in self.functions:
+                if f in self.states[this_state]:
+                    continue
+                new_state, output = self._transition(f, this_state)
+                new_key = key(new_state)
+                existing = index[new_key] if isinstance(index, list) else index.get(new_key)
+                if existing is None:
+                    if (max_states is not None and stats.found >= max_states) or (max_bytes is not None and stats.estimated_bytes >= max_bytes):
+                        self._abort(stats, spill_path)
+                    index[new_key] = new_state
+                    self.states[new_state] = {}
+                    self.nodes.add(new_state)
+                    unexplored.append(new_state)
+                    stats.found += 1
+                    stats.estimated_bytes += Transducer._state_size(new_state)
+                else:
+                    new_state = existing
+                self.states[this_state][f] = (new_state, output)
+                stats.transitions += 1
+                stats.estimated_bytes += sys.getsizeof(output) + 64
+            stats.explored += 1
+        stats.complete = True
+        return stats
+
+    @staticmethod
+    def _state_size(state: State) -> int:
+        x = state[0]
+        return sys.getsizeof(state) + sys.getsizeof(x) + sys.getsizeof(x.__dict__) + sum(map(sys.getsizeof, x.digits)) + sys.getsizeof({})
+
+    def _abort(self, stats: ExplorationStats, spill_path: str | None):
+        if spill_path is not None:
+            with open(spill_path, 'wb') as f:
+                pickle.dump(self, f)
+            stats.spill_path = spill_path
+            self.states = {self.i: {}}
+            self.nodes = {self.i}
+        raise ExplorationLimitExceeded(stats)
+
+    @staticmethod
+    def load(path: str) -> 'Transducer':
+        """
+Reads a transducer spilled by create_transducer_bounded.
+        """
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    def add_function(self, function: pAdicFunction):
+        """
+Adds a map to the IFS, keeping every transition already explored. Only the new transitions are found by the next create_transducer.
+        """
+        assert function.p == self.p
+        assert function not in self.functions
+        self.functions = (*self.functions, function)
+
+    def remove_function(self, function: pAdicFunction):
+        """
+Removes a map from the IFS, keeping the other transitions and pruning states no longer reachable from i.
+        """
+        assert function in self.functions
+        self.functions = tuple(f for f in self.functions if f is not function)
+        for transitions in self.states.values():
+            transitions.pop(function, None)
+        reachable = {self.i}
+        to_visit = [self.i]
+        while len(to_visit) > 0:
+            for next_state, _ in self.states[to_visit.pop()].values():
+                if next_state not in reachable:
+                    reachable.add(next_state)
+                    to_visit.append(next_state)
+        for state in self.nodes.difference(reachable):
+            del self.states[state]
+        self.nodes = reachable
+
+
+# Consulted by every Transducer in this process when set, e.g. to a TransitionCache() for a sweep over systems sharing maps.
+# Off by default, as it keeps the states of released transducers alive.
+transition_cache: TransitionCache | None = None
+
+_worker_transducer: Transducer | None = None
+
+
+def _start_worker(p, functions: tuple[pAdicFunction, ...]):
+    global _worker_transducer
+    _worker_transducer = Transducer(p, (pa.pAdic.zero(p), 1), *functions)
+
+
+def _explore_batch(batch: list[tuple[CompactState, tuple[int, ...]]]) -> list[list[tuple[int, CompactState, tuple]]]:
+    """
+Applies the functions with the given indices to each state of a batch, inside a worker process.
+    """
+    transducer = _worker_transducer
+    results = []
+    for (digits, sign), indices in batch:
+        state = (pa.pAdic(transducer.p, *digits), sign)
+        transitions = []
+        for i in indices:
+            (next_part, next_sign), output = transducer.apply_function(transducer.functions[i], state)
+            transitions.append((i, (next_part.digits, next_sign), output))
+        results.append(transitions)
+    return results
+
+
+class CanonicalIndex:
+    def __init__(self, path: str | None = None):
+        """
+Stores one result per equivalence class of IFS, so equivalent systems in a batch or sweep are only computed once.
+Results should not depend on the choice of representative, e.g. the Hausdorff dimension.
+        :param path: file to keep the index in between runs. Kept in memory if None.
+        """
+        self.path = path
+        self.results: t.MutableMapping[str, t.Any] = shelve.open(path) if path is not None else {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(transducer: Transducer) -> str:
+        return repr(transducer.canonical_form())
+
+    def __contains__(self, transducer: Transducer):
+        return CanonicalIndex.key(transducer) in self.results
+
+    def __getitem__(self, transducer: Transducer):
+        return self.results[CanonicalIndex.key(transducer)]
+
+    def __setitem__(self, transducer: Transducer, value):
+        self.results[CanonicalIndex.key(transducer)] = value
+
+    def get_or_compute(self, transducer: Transducer, compute: t.Callable[[Transducer], t.Any]):
+        """
+Looks up the result for the class of transducer, computing it on the class representative if it is missing.
+        :param transducer: any member of the class
+        :param compute: the expensive computation, e.g. transducer_viewer.hausdorff_dimension
+        :return: result for the class
+        """
+        form = transducer.canonical_form()
+        key = repr(form)
+        if key in self.results:
+            self.hits += 1
+            return self.results[key]
+        self.misses += 1
+        result = compute(Transducer.from_canonical_form(form))
+        self.results[key] = result
+        return result
+
+    def close(self):
+        if isinstance(self.results, shelve.Shelf):
+            self.results.close()
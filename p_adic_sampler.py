@@ -0,0 +1,94 @@
+from typing import Iterator
+
+import numpy as np
+
+import p_adic_IFS as pIFS
+
+
+def truncated_maps(functions: list[pIFS.pAdicFunction], n: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+Reduces each map x -> sign * p^k * x + d to arrays of integers acting on residues mod p^n.
+    :param functions: maps of the IFS, all with the same p
+    :param n: number of digits kept
+    :return: p^min(k, n), p^(n - min(k, n)) and d mod p^n for each map
+    """
+    p = functions[0].p
+    assert all(f.p == p for f in functions)
+    modulus = p ** n
+    if 2 * modulus >= 2 ** 63:
+        raise ValueError(f"{p}^{n} is too large for 64 bit arithmetic")
+    scales, remaining, translations = [], [], []
+    for f in functions:
+        u, v = f.d.to_rational()
+        if v % p == 0:
+            raise ValueError(f"{f} is not a map of the p-adic integers")
+        k = min(f.k, n)
+        scales.append(f.sign * p ** k)
+        remaining.append(p ** (n - k))
+        translations.append(u * pow(v, -1, modulus) % modulus)
+    return np.array(scales, dtype=np.int64), np.array(remaining, dtype=np.int64), np.array(translations, dtype=np.int64)
+
+
+def sample_attractor(functions: list[pIFS.pAdicFunction], n: int, samples: int, chunk_size: int = 1 << 20, seed=None) -> Iterator[np.ndarray]:
+    """
+Plays the chaos game, composing n random maps for each sample. As every map multiplies by at least p, the result mod p^n is the truncation of a point of the attractor.
+    :param functions: maps of the IFS
+    :param n: number of digits kept
+    :param samples: number of points
+    :param chunk_size: number of points computed at once
+    :param seed: seed for numpy.random.default_rng
+    :return: chunks of attractor points mod p^n
+    """
+    scales, remaining, translations = truncated_maps(functions, n)
+    modulus = functions[0].p ** n
+    rng = np.random.default_rng(seed)
+    for start in range(0, samples, chunk_size):
+        size = min(chunk_size, samples - start)
+        x = np.zeros(size, dtype=np.int64)
+        for _ in range(n):
+            c = rng.integers(len(functions), size=size)
+            # p^k * x mod p^n without overflow, then the sign and translation
+            x = (x % remaining[c]) * scales[c] + translations[c]
+            x %= modulus
+        yield x
+
+
+def occupancy(functions: list[pIFS.pAdicFunction], n: int, samples: int, chunk_size: int = 1 << 20, seed=None, max_cells: int = 1 << 27) -> list[int]:
+    """
+Counts the residue classes mod p^j hit by the chaos game, for j = 1..n. Only one bitmap of p^n cells is kept, however many samples are taken.
+    :return: number of occupied classes at each level 1..n
+    """
+    p = functions[0].p
+    if p ** n > max_cells:
+        raise ValueError(f"{p}^{n} cells is more than max_cells = {max_cells}")
+    occupied = np.zeros(p ** n, dtype=bool)
+    for chunk in sample_attractor(functions, n, samples, chunk_size, seed):
+        occupied[chunk] = True
+    # The residue mod p^j is the column of the bitmap with p^j columns, so each level folds the previous one's rows together
+    counts = [int(occupied.sum())]
+    for _ in range(n - 1):
+        occupied = occupied.reshape(p, -1).any(axis=0)
+        counts.append(int(occupied.sum()))
+    return counts[::-1]
+
+
+def box_counting_dimension(counts: list[int], p: int, levels: range | None = None) -> float:
+    """
+Estimates the dimension as the slope of log N_j against j log p.
+    :param counts: number of occupied classes at each level 1..n
+    :param levels: levels to fit, all of them if None. Levels near the number of samples are undersampled.
+    """
+    if levels is None:
+        levels = range(1, len(counts) + 1)
+    j = np.array(levels, dtype=float)
+    log_counts = np.log([counts[i - 1] for i in levels])
+    slope = np.polyfit(j, log_counts, 1)[0] if len(j) > 1 else log_counts[0] / j[0]
+    return slope / np.log(p)
+
+
+def estimate_dimension(functions: list[pIFS.pAdicFunction], n: int, samples: int = 1 << 20, chunk_size: int = 1 << 20, seed=None) -> float:
+    """
+Quick numerical estimate of the Hausdorff dimension, to compare with transducer_viewer.hausdorff_dimension.
+    """
+    counts = occupancy(functions, n, samples, chunk_size, seed)
+    return box_counting_dimension(counts, functions[0].p)
@@ -1,47 +1,156 @@
 import p_adic as pa
 import algebraic_extension as ae
 from math import lcm, gcd
+from itertools import zip_longest
+from typing import Iterable
+
+type Coefficients = tuple[int, ...]
+
+
+def _trim(coefficients: list[int]) -> Coefficients:
+    """
+Drops trailing zero coefficients, in the same way as Polynomial.discard_zero.
+    """
+    j = len(coefficients)
+    while j > 1 and not coefficients[j - 1]:
+        j -= 1
+    return tuple(coefficients[:j])
+
+
+def _add(lhs: Coefficients, rhs: Coefficients, scale: int = 1) -> Coefficients:
+    """
+Returns lhs + scale * rhs as a coefficient tuple.
+    """
+    result = list(lhs) + [0] * (len(rhs) - len(lhs))
+    for i, c in enumerate(rhs):
+        result[i] += scale * c
+    return _trim(result)
+
+
+def _mul(lhs: Coefficients, rhs: Coefficients) -> Coefficients:
+    result = [0] * (len(lhs) + len(rhs) - 1)
+    for i, a in enumerate(lhs):
+        if not a:
+            continue
+        for j, b in enumerate(rhs):
+            result[i + j] += a * b
+    return _trim(result)
+
 
 class Alpha:
     poly = ae.Polynomial[int](0,0,0,0,1,1)
+    # Powers of poly and the denominators 1 - poly^l, shared by every conversion until clear_cache is called
+    _powers: list[Coefficients] = [(1,)]
+    _denominators: dict[int, Coefficients] = {}
+
     def __init__(self, p: pa.pAdic):
         self.p = p.p
-        self.still_digits = list()
-        self.repeating_digits = list()
-        l = len(p.digits[0])
-        k = len(p.digits[1])
-        denom = ae.Polynomial[int](1) - ae.prod(*[Alpha.poly for i in range(l)])
-        num_still = ae.Polynomial(0)
-        for i in p.digits[1]:
-            num_still *= Alpha.poly
-            num_still += i
-        num_still *= denom
-        num_repeating = ae.Polynomial(0)
-        for j in p.digits[0]:
-            num_repeating *= Alpha.poly
-            num_repeating += j
-        num_repeating *= ae.prod(*[ae.Polynomial(0,1) for i in range(k)])
-        num = num_still + num_repeating
-        # print(str(num) + "/" + str(denom))
-        seen: dict[ae.Polynomial[int], int] = {}
-        written = list()
-        a = num[0]
-        # iter = 0
-        written.append(a)
-        while num not in seen:
-            seen[num] = len(written)
-            num -= a * denom
-            num = num >> 1
-            if num[0] != num[0]%self.p:
-                num -= ae.Polynomial(num[0]//self.p*self.p) - ae.Polynomial(num[0]//self.p) * Alpha.poly
-            a = num[0]
-            written.append(a)
-            # print(str(a) + ":" + str(num) + "/" + str(denom))
-            # iter+= 1
-            # if iter > 100:
-            #     raise Exception("Endless")
-        self.still_digits = written[:seen[num]]
-        self.repeating_digits = written[seen[num]:]
+        denom = Alpha._denominator(len(p.digits[0]))
+        self.still_digits, self.repeating_digits = Alpha._expand(Alpha._numerator(p, denom), denom, self.p)
+
+    @staticmethod
+    def _power(n: int) -> Coefficients:
+        """
+Returns poly^n, extending the cache of powers as needed.
+        """
+        powers = Alpha._powers
+        while len(powers) <= n:
+            powers.append(_mul(powers[-1], Alpha.poly.coefficients))
+        return powers[n]
+
+    @staticmethod
+    def _denominator(l: int) -> Coefficients:
+        if l not in Alpha._denominators:
+            Alpha._denominators[l] = _add((1,), Alpha._power(l), -1)
+        return Alpha._denominators[l]
+
+    @staticmethod
+    def clear_cache():
+        """
+Releases the cached powers and denominators. They grow with the longest digit tuple converted, as poly^n has 5n + 1 coefficients.
+        """
+        del Alpha._powers[1:]
+        Alpha._denominators.clear()
+
+    @staticmethod
+    def _numerator(p: pa.pAdic, denom: Coefficients) -> Coefficients:
+        repeating, still, _ = p.digits
+        num_still = (0,)
+        for i, digit in enumerate(reversed(still)):
+            num_still = _add(num_still, Alpha._power(i), digit)
+        num_repeating = (0,)
+        for i, digit in enumerate(reversed(repeating)):
+            num_repeating = _add(num_repeating, Alpha._power(i), digit)
+        num_repeating = tuple([0] * len(still) + list(num_repeating)) if num_repeating != (0,) else num_repeating
+        return _add(_mul(num_still, denom), num_repeating)
+
+    @staticmethod
+    def _step(num: Coefficients, denom: Coefficients, p: int) -> Coefficients:
+        """
+Removes the lowest digit of num / denom, carrying any overflow through p = poly(alpha).
+        """
+        a = num[0] if len(num) > 0 else 0
+        result = list(_trim([c - a * d for c, d in zip_longest(num, denom, fillvalue=0)])[1:])
+        c = result[0] if len(result) > 0 else 0
+        if c != c % p:
+            q = c // p
+            result[0] -= q * p
+            result.extend([0] * (len(Alpha.poly.coefficients) - len(result)))
+            for i, d in enumerate(Alpha.poly.coefficients):
+                result[i] += q * d
+        return _trim(result) if len(result) > 0 else ()
+
+    @staticmethod
+    def _expand(num: Coefficients, denom: Coefficients, p: int) -> tuple[list[int], list[int]]:
+        """
+Finds the digits of num / denom, using Brent's algorithm so only a constant number of numerators is kept at once.
+        :return: still digits, repeating digits
+        """
+        # Find the period
+        power = period = 1
+        tortoise = num
+        hare = Alpha._step(num, denom, p)
+        while tortoise != hare:
+            if power == period:
+                tortoise = hare
+                power *= 2
+                period = 0
+            hare = Alpha._step(hare, denom, p)
+            period += 1
+
+        # Find where the period starts
+        tortoise = hare = num
+        for _ in range(period):
+            hare = Alpha._step(hare, denom, p)
+        written = []
+        while tortoise != hare:
+            written.append(tortoise[0] if len(tortoise) > 0 else 0)
+            tortoise = Alpha._step(tortoise, denom, p)
+            hare = Alpha._step(hare, denom, p)
+
+        # The first repeated numerator ends the still digits
+        for _ in range(period + 1):
+            written.append(tortoise[0] if len(tortoise) > 0 else 0)
+            tortoise = Alpha._step(tortoise, denom, p)
+        start = len(written) - period
+        return written[:start], written[start:]
+
+    @staticmethod
+    def convert_all(values: Iterable[pa.pAdic]) -> list['Alpha']:
+        """
+Converts many p-adic numbers at once, expanding equal inputs (with equal digit tuples) only once.
+Inputs with different digits are expanded separately, sharing only the class caches of powers and denominators like any conversion.
+        :param values: p-adic numbers to convert
+        :return: Alpha for each value, in the same order
+        """
+        converted: dict[tuple, Alpha] = {}
+        result = []
+        for value in values:
+            key = (value.p, value.digits)
+            if key not in converted:
+                converted[key] = Alpha(value)
+            result.append(Alpha.construct(converted[key].still_digits, converted[key].repeating_digits, value.p))
+        return result
 
     def to_polynomial(self):
         denom = ae.Polynomial[int](1) - ae.Polynomial(*([0] * (len(self.repeating_digits)) + [1]))
@@ -51,9 +160,10 @@ class Alpha:
 
     @staticmethod
     def construct(still, infinite, p=3):
-        a = Alpha(pa.pAdic.zero(p))
-        a.still_digits = still
-        a.repeating_digits = infinite
+        a = Alpha.__new__(Alpha)
+        a.p = p
+        a.still_digits = list(still)
+        a.repeating_digits = list(infinite)
         return a
 
     def __str__(self):
@@ -61,23 +171,23 @@ class Alpha:
 
     def _spew(self, i):
         loops, remainder = divmod(i, len(self.repeating_digits))
-        self.still_digits.extend([x for x in self.repeating_digits for j in range(loops)] + self.repeating_digits[:remainder])
+        self.still_digits.extend(self.repeating_digits * loops + self.repeating_digits[:remainder])
         self.repeating_digits = self.repeating_digits[remainder:] + self.repeating_digits[:remainder]
 
     def __rshift__(self, other):
         still_digits = [0]*other + self.still_digits
-        return Alpha.construct(still_digits, self.repeating_digits)
+        return Alpha.construct(still_digits, self.repeating_digits, self.p)
 
     def __lshift__(self, other):
-        i = self
         difference = other - len(self.still_digits)
-        if difference > 0:
-            i._spew(difference)
-        return Alpha.construct(i.still_digits[other:], i.repeating_digits)
+        if difference <= 0:
+            return Alpha.construct(self.still_digits[other:], self.repeating_digits, self.p)
+        remainder = difference % len(self.repeating_digits)
+        return Alpha.construct([], self.repeating_digits[remainder:] + self.repeating_digits[:remainder], self.p)
 
     def _multiply_loop(self, i):
-        return Alpha.construct(self.still_digits, self.repeating_digits * i)
+        return Alpha.construct(self.still_digits, self.repeating_digits * i, self.p)
 
 
 x = Alpha(pa.pAdic.zero(5))
-y = Alpha(pa.pAdic.to_p_adic(5,5))<<1
\ No newline at end of file
+y = Alpha(pa.pAdic.to_p_adic(5,5))<<1
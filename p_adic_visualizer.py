@@ -0,0 +1,132 @@
+import struct
+import zlib
+from collections import OrderedDict
+from typing import Iterator
+
+import numpy as np
+
+import p_adic as pa
+import p_adic_IFS as pIFS
+import transducer_viewer as tv
+
+
+def attractor_dfa(system: pIFS.Transducer | list[pIFS.pAdicFunction]) -> tuple[tv.MyGraph, int]:
+    """
+Builds the DFA whose words are the digit prefixes of points of the attractor.
+    :param system: a transducer, or the maps of the IFS
+    :return: DFA, p
+    """
+    if not isinstance(system, pIFS.Transducer):
+        p = system[0].p
+        system = pIFS.Transducer(p, (pa.pAdic.zero(p), 1), *system)
+    return tv.make_dfa(system), system.p
+
+
+def _transitions(dfa: tv.MyGraph) -> list[list[tuple[int, int]]]:
+    ids = {node: i for i, node in enumerate(dfa.graph)}
+    return [[(int(label), ids[head]) for label, head in dfa.graph[node]] for node in dfa.graph]
+
+
+def _positions(transitions: list[list[tuple[int, int]]], start: dict[int, np.ndarray], p: int, levels: int) -> dict[int, np.ndarray]:
+    """
+Reads every word of the given length from the DFA, one level at a time. The first digit read is the most significant in the position, so each cylinder set is a contiguous block.
+    :param start: positions of the words read so far, for each DFA state
+    :return: positions of the extended words, for each DFA state they end in
+    """
+    frontier = start
+    for _ in range(levels):
+        found: dict[int, list[np.ndarray]] = {}
+        for state, positions in frontier.items():
+            for digit, head in transitions[state]:
+                found.setdefault(head, []).append(positions * p + digit)
+        frontier = {state: np.concatenate(positions) for state, positions in found.items()}
+    return frontier
+
+
+def _width_digits(p: int, n: int, width_digits: int | None, block_cells: int) -> int:
+    """
+Digits of the column position, by default about half of them but few enough that a row fits in a block.
+    """
+    if width_digits is None:
+        width_digits = 0
+        while width_digits < (n + 1) // 2 and p ** (width_digits + 1) <= block_cells:
+            width_digits += 1
+    assert 0 <= width_digits <= n and p ** width_digits <= max(block_cells, 1)
+    return width_digits
+
+
+def image_blocks(dfa: tv.MyGraph, p: int, n: int, width_digits: int | None = None, block_cells: int = 1 << 22) -> Iterator[tuple[int, np.ndarray]]:
+    """
+Lays out the cylinder sets of depth n as an image of p^(n - w) rows and p^w columns, w = width_digits.
+The first n - w digits pick the row and the rest the column, both with the first digit most significant, so each cylinder set is a block of rows or of columns.
+Every row is determined by the DFA state its prefix leads to, so rows are kept per state, for the most recently used states up to a block's worth of cells.
+    :param block_cells: roughly how many cells to produce at once, and at most the width of the image
+    :return: first row and a block of rows, 1 for cells in the attractor and 0 otherwise
+    """
+    width_digits = _width_digits(p, n, width_digits, block_cells)
+    transitions = _transitions(dfa)
+    height, width = p ** (n - width_digits), p ** width_digits
+
+    row_states = np.full(height, -1, dtype=np.int64)
+    for state, positions in _positions(transitions, {0: np.zeros(1, dtype=np.int64)}, p, n - width_digits).items():
+        row_states[positions] = state
+
+    empty = np.zeros(width, dtype=np.uint8)
+    rows: OrderedDict[int, np.ndarray] = OrderedDict()
+    block_rows = max(1, block_cells // width)
+    for start in range(0, height, block_rows):
+        states, inverse = np.unique(row_states[start:start + block_rows], return_inverse=True)
+        distinct = []
+        for state in map(int, states):
+            if state < 0:
+                distinct.append(empty)
+                continue
+            if state in rows:
+                rows.move_to_end(state)
+            else:
+                row = np.zeros(width, dtype=np.uint8)
+                for positions in _positions(transitions, {state: np.zeros(1, dtype=np.int64)}, p, width_digits).values():
+                    row[positions] = 1
+                rows[state] = row
+                if len(rows) > block_rows:
+                    rows.popitem(last=False)
+            distinct.append(rows[state])
+        yield start, np.stack(distinct)[inverse]
+
+
+def render_npy(system: pIFS.Transducer | list[pIFS.pAdicFunction], n: int, path: str, width_digits: int | None = None, block_cells: int = 1 << 22) -> np.memmap:
+    """
+Writes the attractor at depth n to a .npy file through a memmap, one block of rows at a time.
+    :return: the memmap, 1 for cells in the attractor
+    """
+    dfa, p = attractor_dfa(system)
+    width_digits = _width_digits(p, n, width_digits, block_cells)
+    image = np.lib.format.open_memmap(path, mode='w+', dtype=np.uint8, shape=(p ** (n - width_digits), p ** width_digits))
+    for start, block in image_blocks(dfa, p, n, width_digits, block_cells):
+        image[start:start + len(block)] = block
+    image.flush()
+    return image
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+
+
+def render_png(system: pIFS.Transducer | list[pIFS.pAdicFunction], n: int, path: str, width_digits: int | None = None, block_cells: int = 1 << 22):
+    """
+Writes the attractor at depth n to a greyscale PNG, compressing one block of rows at a time. Cells in the attractor are black.
+    """
+    dfa, p = attractor_dfa(system)
+    width_digits = _width_digits(p, n, width_digits, block_cells)
+    compressor = zlib.compressobj()
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(_png_chunk(b'IHDR', struct.pack('>IIBBBBB', p ** width_digits, p ** (n - width_digits), 8, 0, 0, 0, 0)))
+        for _, block in image_blocks(dfa, p, n, width_digits, block_cells):
+            # Each row starts with filter type 0
+            scanlines = np.hstack([np.zeros((len(block), 1), dtype=np.uint8), 255 * (1 - block)])
+            data = compressor.compress(scanlines.tobytes())
+            if len(data) > 0:
+                f.write(_png_chunk(b'IDAT', data))
+        f.write(_png_chunk(b'IDAT', compressor.flush()))
+        f.write(_png_chunk(b'IEND', b''))
@@ -0,0 +1,334 @@
+import hashlib
+from collections import OrderedDict
+from decimal import Decimal, localcontext, ROUND_FLOOR, ROUND_CEILING
+from fractions import Fraction
+from math import gcd
+
+import numpy as np
+
+import algebraic_extension as ae
+import p_adic_IFS as pIFS
+from dfa_counting import _arcs, _primes, berlekamp_massey
+from transducer_viewer import MyGraph, make_dfa
+
+
+def _components(size: int, tails: np.ndarray, heads: np.ndarray) -> list[list[int]]:
+    """
+Strongly connected components of the graph, by Tarjan's algorithm without recursion.
+    """
+    order = np.argsort(tails, kind='stable')
+    targets = heads[order].tolist()
+    offsets = np.searchsorted(tails[order], np.arange(size + 1)).tolist()
+
+    index = [-1] * size
+    low = [0] * size
+    on_stack = [False] * size
+    stack: list[int] = []
+    components: list[list[int]] = []
+    counter = 0
+    for root in range(size):
+        if index[root] != -1:
+            continue
+        work = [(root, offsets[root])]
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        while work:
+            node, position = work[-1]
+            if position < offsets[node + 1]:
+                work[-1] = (node, position + 1)
+                head = targets[position]
+                if index[head] == -1:
+                    index[head] = low[head] = counter
+                    counter += 1
+                    stack.append(head)
+                    on_stack[head] = True
+                    work.append((head, offsets[head]))
+                elif on_stack[head]:
+                    low[node] = min(low[node], index[head])
+                continue
+            work.pop()
+            if work:
+                low[work[-1][0]] = min(low[work[-1][0]], low[node])
+            if low[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+    return components
+
+
+def _apply(tails: np.ndarray, heads: np.ndarray, vector: np.ndarray, modulus: int | None = None) -> np.ndarray:
+    """
+Multiplies a vector by the adjacency matrix of the arcs.
+    """
+    result = np.zeros(len(vector), dtype=vector.dtype)
+    np.add.at(result, tails, vector[heads])
+    return result % modulus if modulus is not None else result
+
+
+def _annihilates(tails: np.ndarray, heads: np.ndarray, size: int, recurrence: list[int]) -> bool:
+    """
+Checks exactly that B^L 1 = a_1 B^(L-1) 1 + ... + a_L 1 for the adjacency matrix B.
+    """
+    vectors = [np.ones(size, dtype=object)]
+    for _ in recurrence:
+        vectors.append(_apply(tails, heads, vectors[-1]))
+    combination = sum(a * vectors[-1 - i] for i, a in enumerate(recurrence, start=1))
+    return bool(np.all(vectors[-1] == combination))
+
+
+def minimal_polynomial(tails: np.ndarray, heads: np.ndarray, size: int, max_degree: int | None = None) -> ae.Polynomial[int] | None:
+    """
+The minimal polynomial of the all ones vector under the adjacency matrix B of an irreducible graph.
+Candidates come from the Berlekamp-Massey algorithm on r^T B^k 1 for a random r, mod several primes, combined by the Chinese remainder theorem,
+on more terms and with a new r each time one fails. A candidate is only accepted once it is checked exactly to annihilate 1, and then it is the
+minimal polynomial, as it is no longer than the minimal recurrence of the sequence, which divides that of 1.
+As the Perron vectors of B are positive, the Perron root is one of its roots, and every other root is an eigenvalue of B.
+    :param max_degree: give up once the degree is known to be larger
+    :return: x^L - a_1 x^(L-1) - ... - a_L, with integer coefficients, or None if L > max_degree
+    """
+    rng = np.random.default_rng(0)
+    weights = rng.integers(1, 2 ** 30, size=size)
+    terms = min(16, 2 * size)
+    length = -1
+    residues: list[int] = []
+    modulus = 1
+    previous: list[int] | None = None
+    for prime in _primes():
+        vector = np.ones(size, dtype=np.int64)
+        counts = []
+        for _ in range(terms):
+            counts.append(int((weights * vector % prime).sum()) % prime)
+            vector = _apply(tails, heads, vector, prime)
+        recurrence = berlekamp_massey(counts, prime)
+        if max_degree is not None and len(recurrence) > max_degree:
+            # The minimal recurrence mod a prime is never longer than over the integers
+            return None
+        if 2 * len(recurrence) + 4 > terms and terms < 2 * size:
+            # Too few terms to pin the recurrence down
+            terms, length = min(2 * terms, 2 * size), -1
+            continue
+        if len(recurrence) < length:
+            # The recurrence can only get shorter mod a prime
+            continue
+        if len(recurrence) > length:
+            length, residues, modulus, previous = len(recurrence), [0] * len(recurrence), 1, None
+        residues = [x + modulus * ((a - x) * pow(modulus, -1, prime) % prime) for x, a in zip(residues, recurrence)]
+        modulus *= prime
+        lifted = [x if 2 * x < modulus else x - modulus for x in residues]
+        if lifted == previous:
+            if _annihilates(tails, heads, size, lifted):
+                return ae.Polynomial(*[-a for a in reversed(lifted)], 1)
+            terms, length = min(2 * terms, 2 * size), -1
+            weights = rng.integers(1, 2 ** 30, size=size)
+        previous = lifted
+    raise ArithmeticError
+
+
+def _primitive(polynomial: ae.Polynomial[int]) -> ae.Polynomial[int]:
+    content = gcd(*polynomial.coefficients)
+    return ae.Polynomial(*[c // content for c in polynomial.coefficients])
+
+
+def _derivative(polynomial: ae.Polynomial[int]) -> ae.Polynomial[int]:
+    return ae.Polynomial(*[i * c for i, c in enumerate(polynomial.coefficients)][1:])
+
+
+def _remainders(a: ae.Polynomial[int], b: ae.Polynomial[int]) -> list[ae.Polynomial[int]]:
+    """
+Negated remainder sequence of a and b, fraction free. Each pseudo remainder is d^e a - q b with d the leading coefficient of b,
+so its sign is fixed when d^e is negative, and it is divided by its content, which leaves the signs of every term unchanged.
+    """
+    chain = [a, b]
+    while chain[-1].degree > 0:
+        a, b = chain[-2], chain[-1]
+        e = a.degree - b.degree + 1
+        _, r = ae.pseudo_division(a, b, iteration_limit=e)
+        if not any(r.coefficients):
+            break
+        chain.append(_primitive(-r if b[b.degree] ** e > 0 else r))
+    return chain
+
+
+def sturm_chain(polynomial: ae.Polynomial[int]) -> list[ae.Polynomial[int]]:
+    """
+The Sturm chain of the square free part of an integer polynomial, which has the same distinct roots.
+    """
+    chain = _remainders(polynomial, _derivative(polynomial))
+    divisor = chain[-1]
+    if divisor.degree > 0:
+        quotient, _ = ae.pseudo_division(polynomial, divisor, iteration_limit=polynomial.degree)
+        chain = _remainders(_primitive(quotient), _derivative(_primitive(quotient)))
+    return chain
+
+
+def _sign(polynomial: ae.Polynomial[int], x: Fraction) -> int:
+    """
+Sign of the polynomial at a rational, in integers: d^n P(u/d) = sum c_i u^i d^(n - i).
+    """
+    u, d = x.numerator, x.denominator
+    value = polynomial[polynomial.degree]
+    power = 1
+    for c in reversed(polynomial.coefficients[:-1]):
+        power *= d
+        value = value * u + c * power
+    return (value > 0) - (value < 0)
+
+
+def _variations(signs: list[int]) -> int:
+    signs = [s for s in signs if s != 0]
+    return sum(1 for s, t in zip(signs, signs[1:]) if s != t)
+
+
+def roots_above(chain: list[ae.Polynomial[int]], x: Fraction) -> int:
+    """
+Number of distinct real roots greater than x, by Sturm's theorem.
+    """
+    at_infinity = _variations([1 if c[c.degree] > 0 else -1 for c in chain])
+    return _variations([_sign(c, x) for c in chain]) - at_infinity
+
+
+def collatz_wielandt(tails: np.ndarray, heads: np.ndarray, size: int) -> tuple[Fraction, Fraction]:
+    """
+Bounds min (Bx)_i / x_i <= rho <= max (Bx)_i / x_i on the Perron root of an irreducible graph, which hold for any positive x.
+x is the Perron vector from a dense float eigensolver, rounded to positive integers, so the bounds are exact but only about as close as float precision.
+    """
+    matrix = np.zeros((size, size))
+    np.add.at(matrix, (tails, heads), 1)
+    values, vectors = np.linalg.eig(matrix)
+    vector = np.abs(vectors[:, np.argmax(values.real)].real)
+    x = np.maximum(np.round(vector / vector.max() * 2.0 ** 52), 1).astype(np.int64).astype(object)
+    product = _apply(tails, heads, x)
+    ratios = [Fraction(int(a), int(b)) for a, b in zip(product, x)]
+    return min(ratios), max(ratios)
+
+
+class _Block:
+    # Components whose minimal polynomial has a larger degree are only bounded to about float precision, as their Sturm chains are slow to build
+    _MAX_DEGREE = 64
+
+    def __init__(self, tails: np.ndarray, heads: np.ndarray, size: int):
+        """
+The Perron root of one strongly connected component, isolated in (lower, upper].
+Every root of the minimal polynomial is at most the Perron root in absolute value, so it is the largest real root, and lies between the smallest and largest row sums.
+        """
+        row_sums = np.bincount(tails, minlength=size)
+        self.upper = Fraction(int(row_sums.max()))
+        self.chain = None
+        if row_sums.min() == row_sums.max():
+            self.lower = self.upper
+            return
+        self.lower = Fraction(int(row_sums.min()) - 1)
+        polynomial = minimal_polynomial(tails, heads, size, _Block._MAX_DEGREE)
+        if polynomial is None:
+            lower, upper = collatz_wielandt(tails, heads, size)
+            self.lower, self.upper = max(self.lower, lower), min(self.upper, upper)
+            return
+        self.chain = sturm_chain(polynomial)
+        self.count = roots_above(self.chain, self.lower)
+
+    def refine(self, bits: int):
+        """
+Bisects until the interval is narrower than 2^-bits, counting roots with the Sturm chain until the Perron root is the only one left in the interval.
+From then on, being a simple root, it is where the polynomial changes sign, so only the polynomial is evaluated.
+        """
+        if self.chain is None:
+            return
+        width = Fraction(1, 2 ** bits)
+        polynomial = self.chain[0]
+        if _sign(polynomial, self.upper) == 0:
+            self.lower, self.chain = self.upper, None
+            return
+        while self.upper - self.lower > width:
+            middle = (self.lower + self.upper) / 2
+            if self.count == 1:
+                sign = _sign(polynomial, middle)
+                if sign == 0:
+                    self.lower = self.upper = middle
+                elif sign == _sign(polynomial, self.upper):
+                    self.upper = middle
+                else:
+                    self.lower = middle
+                continue
+            count = roots_above(self.chain, middle)
+            if count > 0:
+                self.lower, self.count = middle, count
+            else:
+                self.upper = middle
+
+
+# Blocks that could hold the Perron root, for the DFAs seen most recently
+_blocks: OrderedDict[tuple[int, bytes], list[_Block]] = OrderedDict()
+_BLOCKS_MAXSIZE = 64
+
+
+def perron_root(dfa: MyGraph, bits: int = 64) -> tuple[Fraction, Fraction]:
+    """
+Certified bounds on the spectral radius of the adjacency matrix of the DFA, without forming it.
+The spectral radius is the largest of those of the strongly connected components. Components with a smaller largest row sum than a lower bound found
+for another are skipped, and the rest are kept for later calls on an identical DFA, which only refine them further.
+    :param bits: the bounds are within 2^-bits of each other, unless a component has a minimal polynomial of degree over _Block._MAX_DEGREE,
+    which is only bounded to about float precision
+    :return: lower, upper, with lower <= rho <= upper
+    """
+    tails, heads = _arcs(dfa)
+    size = len(dfa.graph)
+    key = (size, hashlib.sha256(tails.tobytes() + heads.tobytes()).digest())
+    blocks = _blocks.get(key)
+    if blocks is not None:
+        _blocks.move_to_end(key)
+    else:
+        blocks = []
+        lower = Fraction(0)
+        component = np.empty(size, dtype=np.int64)
+        position = np.empty(size, dtype=np.int64)
+        components = _components(size, tails, heads)
+        for i, members in enumerate(components):
+            component[members] = i
+            position[members] = np.arange(len(members))
+        inside = component[tails] == component[heads]
+        row_sums = np.bincount(tails[inside], minlength=size)
+        for i in sorted(range(len(components)), key=lambda i: -row_sums[components[i]].max()):
+            if row_sums[components[i]].max() <= lower:
+                break
+            arcs = inside & (component[tails] == i)
+            block = _Block(position[tails[arcs]], position[heads[arcs]], len(components[i]))
+            block.refine(bits)
+            blocks.append(block)
+            lower = max(lower, block.lower)
+        _blocks[key] = blocks
+        while len(_blocks) > _BLOCKS_MAXSIZE:
+            _blocks.popitem(last=False)
+
+    for block in blocks:
+        block.refine(bits)
+    if not blocks:
+        return Fraction(0), Fraction(0)
+    return max(block.lower for block in blocks), max(block.upper for block in blocks)
+
+
+def certified_dimension(transducer: pIFS.Transducer, digits: int = 30, dfa: MyGraph | None = None) -> tuple[Decimal, Decimal]:
+    """
+Bounds on the Hausdorff dimension log(rho) / log(p), rounded outwards to the given number of decimal places.
+The logarithms are computed with extra digits, and their rounding errors allowed for.
+When a component is only bounded to about float precision, so are these.
+    """
+    lower, upper = perron_root(dfa if dfa is not None else make_dfa(transducer), bits=4 * digits + 16)
+    if upper == 0:
+        return Decimal('-Infinity'), Decimal('-Infinity')
+    # A nonzero spectral radius of an integer matrix is at least 1
+    lower = max(lower, Fraction(1))
+    quantum = Decimal(1).scaleb(-digits)
+    with localcontext() as context:
+        context.prec = digits + 20
+        slack = Decimal(1).scaleb(-digits - 10)
+        log_p = Decimal(transducer.p).ln()
+        low = (Decimal(lower.numerator) / Decimal(lower.denominator)).ln() / log_p - slack
+        high = (Decimal(upper.numerator) / Decimal(upper.denominator)).ln() / log_p + slack
+        return max(low, Decimal(0)).quantize(quantum, ROUND_FLOOR), high.quantize(quantum, ROUND_CEILING)
@@ -0,0 +1,51 @@
+import random
+
+import numpy as np
+import pytest
+
+import dfa_counting as dc
+import p_adic as pa
+import p_adic_IFS as pIFS
+import transducer_viewer as tv
+
+
+def _random_graph(rng: random.Random, size: int) -> tv.MyGraph:
+    graph = tv.MyGraph()
+    for node in range(size):
+        graph.add_node(str(node))
+    for _ in range(rng.randint(0, 3 * size)):
+        graph.add_edge(str(rng.randrange(size)), str(rng.randrange(size)), '0')
+    return graph
+
+
+def _dfas() -> list[tv.MyGraph]:
+    p = 5
+    maps = [(0, 1, 1, -1), (1, 2, 2, 1), (3, 7, 1, -1)]
+    functions = [pIFS.pAdicFunction(p, '', pa.pAdic.to_p_adic(p, u, v), k, '+' if sign > 0 else '-') for u, v, k, sign in maps]
+    rng = random.Random(3)
+    return [tv.make_dfa(pIFS.Transducer(p, (pa.pAdic.zero(p), 1), *functions))] + [_random_graph(rng, rng.randint(1, 8)) for _ in range(20)]
+
+
+def _matrix_counts(dfa: tv.MyGraph, length: int) -> list[int]:
+    matrix = dfa.adjacency_matrix().astype(object)
+    row = np.eye(len(matrix), dtype=object)[0]
+    counts = []
+    for _ in range(length):
+        counts.append(int(row.sum()))
+        row = row.dot(matrix)
+    return counts
+
+
+@pytest.mark.parametrize('dfa', _dfas())
+def test_counts_match_matrix_powers(dfa):
+    m = len(dfa.graph)
+    recurrence = dc.path_recurrence(dfa)
+    modulus = 1_000_003
+    expected = dict(enumerate(_matrix_counts(dfa, 6 * m + 6)))
+    expected[3000] = int(np.linalg.matrix_power(dfa.adjacency_matrix().astype(object), 3000)[0].sum())
+    for n, count in expected.items():
+        assert dc.count_paths(dfa, n, recurrence=recurrence) == count
+        assert dc.count_paths(dfa, n, modulus, recurrence) == count % modulus
+    # Without a recurrence, small n are counted directly and the rest find it themselves
+    for n in (0, 4 * m - 1, 4 * m, 6 * m + 5, 3000):
+        assert dc.count_paths(dfa, n) == expected[n]
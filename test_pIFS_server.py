@@ -0,0 +1,68 @@
+import asyncio
+import socket
+
+import pytest
+
+from pIFS_server import AnalysisServer
+
+DEFINITION = "p: 5\nDIMENSION\nA: -5x\nB: 5^2 * x + 1/2\n"
+
+
+async def _request(port: int, method: str, path: str, body: str = '', headers: dict[str, str] | None = None, half_close: bool = False) -> tuple[str, str]:
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    head = ''.join(f'{name}: {value}\r\n' for name, value in (headers or {}).items())
+    writer.write(f"{method} {path} HTTP/1.1\r\n{head}Content-Length: {len(body.encode())}\r\n\r\n{body}".encode())
+    await writer.drain()
+    if half_close:
+        writer.transport.get_extra_info('socket').shutdown(socket.SHUT_WR)
+    response = (await reader.read()).decode()
+    writer.close()
+    status, _, rest = response.partition('\r\n')
+    return status, rest.partition('\r\n\r\n')[2]
+
+
+def _with_server(test):
+    async def run():
+        server = AnalysisServer(workers=1)
+        serving = asyncio.create_task(server.serve(port=0))
+        while server.server is None:
+            await asyncio.sleep(0.01)
+        try:
+            await test(server, server.server.sockets[0].getsockname()[1])
+        finally:
+            serving.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await serving
+    asyncio.run(run())
+
+
+def test_run_and_cache():
+    async def test(server: AnalysisServer, port: int):
+        status, body = await _request(port, 'POST', '/run', DEFINITION)
+        assert status == 'HTTP/1.1 200 OK' and body.startswith('0.29899371783')
+        assert await _request(port, 'POST', '/run', DEFINITION) == (status, body)
+        _, stats = await _request(port, 'GET', '/stats')
+        assert 'results: 1/256 entries, 1 hits, 1 misses' in stats
+    _with_server(test)
+
+
+def test_half_closed_client_gets_result():
+    async def test(server: AnalysisServer, port: int):
+        status, body = await _request(port, 'POST', '/run', DEFINITION, half_close=True)
+        assert status == 'HTTP/1.1 200 OK' and body.startswith('0.29899371783')
+    _with_server(test)
+
+
+def test_cancel():
+    async def test(server: AnalysisServer, port: int):
+        async def slow(definition: str) -> str:
+            await asyncio.sleep(60)
+            return ''
+        server.run = slow
+        running = asyncio.create_task(_request(port, 'POST', '/run', DEFINITION, {'X-Request-Id': 'slow'}))
+        while 'slow' not in server.running:
+            await asyncio.sleep(0.01)
+        assert await _request(port, 'POST', '/cancel/slow') == ('HTTP/1.1 200 OK', 'Cancelled\n')
+        assert await running == ('HTTP/1.1 409 Conflict', 'Cancelled\n')
+        assert (await _request(port, 'POST', '/cancel/slow'))[0] == 'HTTP/1.1 404 Not Found'
+    _with_server(test)
@@ -0,0 +1,82 @@
+import random
+from math import gcd
+
+import pytest
+
+import p_adic as pa
+
+# Expansions given by the digit-by-digit conversion of the baseline
+KNOWN = [
+    ((5, 1, 2), '[2]3.'),
+    ((2, 1, 3), '[0_1]1.'),
+    ((5, -1, 1), '[4].'),
+    ((3, 5, 1), '[0]1_2.'),
+    ((5, 7, 25), '[0].1_2'),
+    ((3, -7, 2), '[1]0_1.'),
+    ((7, -3, 10), '[2_0_4_6].'),
+    ((11, 5, 13), '[7_6_8_5_0_9_3_4_2_5_10_1]8.'),
+    ((2, -5, 12), '[1_0].0_1'),
+]
+
+
+def _random_fractions(count: int, seed: int):
+    rng = random.Random(seed)
+    while count > 0:
+        p = rng.choice([2, 3, 5, 7, 11])
+        denom = rng.randint(1, 60) * rng.choice([1, 1, p, p * p])
+        num = rng.randint(-300, 300)
+        if gcd(num, denom) == 1:
+            count -= 1
+            yield p, num, denom
+
+
+@pytest.mark.parametrize('fraction, expansion', KNOWN)
+def test_known_expansions(fraction, expansion):
+    assert repr(pa.pAdic.from_rational(*fraction)) == expansion
+    assert repr(pa.pAdic.to_p_adic(*fraction)) == expansion
+
+
+def _assert_expands(x: pa.pAdic, p: int, num: int, denom: int):
+    """
+Checks x is condensed and its digits are those of num / denom, from its residues.
+    """
+    g = gcd(num, denom)
+    num, denom = num // g, denom // g
+    if denom < 0:
+        num, denom = -num, -denom
+    assert x.to_rational() == (num, denom)
+    assert x.condense() == x
+    # With denom = p^shift * rest, the digits from place -shift up to n - 1 are num / rest mod p^(n + shift)
+    shift = len(x.digits[2])
+    rest = denom // p ** shift
+    assert rest % p != 0
+    modulus = p ** (12 + shift)
+    residue = sum(x[i] * p ** (i + shift) for i in range(-shift, 12))
+    assert residue == num * pow(rest, -1, modulus) % modulus
+
+
+def test_from_rational_digits_match_residues():
+    for p, num, denom in _random_fractions(300, 0):
+        x = pa.pAdic.from_rational(p, num, denom)
+        _assert_expands(x, p, num, denom)
+        assert pa.pAdic.to_p_adic(p, num, denom) == x
+
+
+def test_non_reduced_inputs():
+    assert pa.pAdic.to_p_adic(3, -21, 6) == pa.pAdic.from_rational(3, -7, 2)
+    assert repr(pa.pAdic.to_p_adic(7, 4, 49)) == '[0].0_4'
+    assert pa.pAdic.to_p_adic(5, 10, -4) == pa.pAdic.from_rational(5, -5, 2)
+
+
+def test_addition_matches_rationals():
+    rng = random.Random(1)
+    for p, a, b in _random_fractions(300, 1):
+        c, d = rng.randint(-300, 300), rng.randint(1, 60) * rng.choice([1, p])
+        _assert_expands(pa.pAdic.from_rational(p, a, b) + pa.pAdic.from_rational(p, c, d), p, a * d + c * b, b * d)
+
+
+@pytest.mark.parametrize('p, denom, order', [(2, 15, 4), (2, 21, 6), (5, 12, 2), (3, 40, 4), (7, 100, 4), (2, 255, 8), (3, 91, 6), (2, 9, 6), (2, 27, 18), (3, 16, 4), (2, 4095, 12), (5, 1, 1)])
+def test_multiplicative_order(p, denom, order):
+    assert pa.pAdic.multiplicative_order(p, denom) == order
+    assert pow(p, order, denom) == 1 % denom
+    assert all(pow(p, k, denom) != 1 for k in range(1, order))
@@ -0,0 +1,107 @@
+import itertools
+
+import pytest
+
+import p_adic as pa
+import p_adic_IFS as pIFS
+import transducer_viewer as tv
+
+
+def _residues(p: int, maps: list[tuple[int, int, int, int]], n: int) -> set[int]:
+    """
+Points of the attractor mod p^n, composing n maps x -> sign * p^k * x + u / v directly.
+    """
+    modulus = p ** n
+    points = set()
+    for word in itertools.product(maps, repeat=n):
+        x = 0
+        for u, v, k, sign in reversed(word):
+            x = (sign * p ** k * x + u * pow(v, -1, modulus)) % modulus
+        points.add(x)
+    return points
+
+
+def _dfa_residues(dfa: tv.MyGraph, p: int, n: int) -> set[int]:
+    """
+Words of length n from the initial state, read with the first digit least significant.
+    """
+    frontier = [(next(iter(dfa.graph)), 0, 1)]
+    for _ in range(n):
+        frontier = [(head, x + int(label) * place, place * p) for node, x, place in frontier for label, head in dfa.graph[node]]
+    return {x for _, x, _ in frontier}
+
+
+def test_dfa_matches_composition_with_negative_maps():
+    p, n = 5, 4
+    maps = [(0, 1, 1, -1), (1, 2, 2, 1), (3, 7, 1, -1)]
+    functions = [pIFS.pAdicFunction(p, '', pa.pAdic.to_p_adic(p, u, v), k, '+' if sign > 0 else '-') for u, v, k, sign in maps]
+    dfa = tv.make_dfa(pIFS.Transducer(p, (pa.pAdic.zero(p), 1), *functions))
+    assert _dfa_residues(dfa, p, n) == _residues(p, maps, n)
+
+
+def test_bounded_exploration_with_large_denominator():
+    p = 5
+    d = 5 ** 20 - 1
+    functions = [pIFS.pAdicFunction(p, '', pa.pAdic.from_rational(p, 1, d), 1, '+'), pIFS.pAdicFunction(p, '', pa.pAdic.from_rational(p, 2, d), 1, '-')]
+    transducer = pIFS.Transducer(p, (pa.pAdic.zero(p), 1), *functions)
+    with pytest.raises(pIFS.ExplorationLimitExceeded) as raised:
+        transducer.create_transducer_bounded(max_states=1000)
+    assert raised.value.stats.found == 1000
+    assert not raised.value.stats.complete
+
+
+def test_bounded_exploration_bypasses_transition_cache(monkeypatch):
+    p = 5
+    cache = pIFS.TransitionCache()
+    monkeypatch.setattr(pIFS, 'transition_cache', cache)
+    functions = [pIFS.pAdicFunction(p, '', pa.pAdic.from_rational(p, 0, 1), 1, '-'), pIFS.pAdicFunction(p, '', pa.pAdic.from_rational(p, 1, 2), 2, '+')]
+    transducer = pIFS.Transducer(p, (pa.pAdic.zero(p), 1), *functions)
+    assert transducer.create_transducer_bounded().complete
+    assert len(cache) == 0
+
+
+def test_transition_cache_lru_eviction():
+    cache = pIFS.TransitionCache(2, 'lru')
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+    assert (cache.hits, cache.misses, cache.evictions) == (3, 1, 1)
+    assert cache.hit_rate() == 0.75
+
+
+def test_transition_cache_lfu_eviction():
+    cache = pIFS.TransitionCache(2, 'lfu')
+    assert cache.hit_rate() == 0.0
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('b')
+    cache.get('b')
+    cache.get('a')
+    # a is used less often than b
+    cache.put('c', 3)
+    assert set(cache.values) == {'b', 'c'}
+    # c is used as often as a new entry, and is older
+    cache.put('d', 4)
+    assert set(cache.values) == {'b', 'd'}
+    assert cache.get('a') is None
+    assert (cache.hits, cache.misses, cache.evictions) == (3, 1, 2)
+
+
+def test_transition_cache_shared_between_transducers(monkeypatch):
+    p = 5
+    cache = pIFS.TransitionCache()
+    monkeypatch.setattr(pIFS, 'transition_cache', cache)
+    functions = [pIFS.pAdicFunction(p, '', pa.pAdic.from_rational(p, 0, 1), 1, '-'), pIFS.pAdicFunction(p, '', pa.pAdic.from_rational(p, 1, 2), 2, '+')]
+    first = pIFS.Transducer(p, (pa.pAdic.zero(p), 1), *functions)
+    first.create_transducer()
+    assert cache.hits == 0
+    second = pIFS.Transducer(p, (pa.pAdic.zero(p), 1), *reversed(functions))
+    second.create_transducer()
+    assert cache.misses == len(cache) and cache.hits == cache.misses
+    monkeypatch.setattr(pIFS, 'transition_cache', None)
+    third = pIFS.Transducer(p, (pa.pAdic.zero(p), 1), *functions)
+    third.create_transducer()
+    assert first.nodes == second.nodes == third.nodes
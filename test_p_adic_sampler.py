@@ -0,0 +1,14 @@
+import numpy as np
+
+import p_adic as pa
+import p_adic_IFS as pIFS
+import p_adic_sampler as ps
+
+
+def test_occupancy_counts_residues_of_the_samples():
+    p, n = 3, 7
+    functions = [pIFS.pAdicFunction(p, '', pa.pAdic.from_rational(p, u, v), k, sign) for u, v, k, sign in [(0, 1, 1, '-'), (1, 2, 2, '+'), (2, 5, 1, '+')]]
+    points = np.concatenate(list(ps.sample_attractor(functions, n, 5000, 1000, seed=4)))
+    expected = [len(np.unique(points % p ** j)) for j in range(1, n + 1)]
+    assert ps.occupancy(functions, n, 5000, 1000, seed=4) == expected
+    assert expected[0] <= p and expected[-1] < p ** n
@@ -0,0 +1,33 @@
+import pytest
+
+import p_adic as pa
+import p_adic_to_extension as pe
+
+# Expansions from the conversion before it was rewritten on coefficient tuples
+KNOWN = [
+    (2, 0, 1, '00[0]'),
+    (2, 1, 1, '10[0]'),
+    (2, 5, 1, '1000000010100110[0]'),
+    (2, -1, 1, '100011001010100110[0]'),
+    (3, 5, 1, '2000110[0]'),
+    (3, -1, 1, '200022002120211221[1]'),
+    (3, -3, 4, '0000220000002002021221001212001201202111112[111001120210220212110221200201220201011112]'),
+    (5, 5, 1, '0000110[0]'),
+    (5, -1, 1, '400044004340433443[3]'),
+    (5, -3, 4, '300033003130300334[241211100443203203024444233322332123200224]'),
+    (5, 1, 3, '23000110031301441323242[000041112211424120024414032222022244220302422400202144442333003321230440223242]'),
+]
+
+
+@pytest.mark.parametrize('p, num, denom, expected', KNOWN)
+def test_known_expansions(p, num, denom, expected):
+    assert str(pe.Alpha(pa.pAdic.from_rational(p, num, denom))) == expected
+
+
+def test_convert_all_matches_alpha():
+    values = [pa.pAdic.from_rational(p, num, denom) for p, num, denom, _ in KNOWN]
+    pe.Alpha.clear_cache()
+    assert len(pe.Alpha._powers) == 1 and len(pe.Alpha._denominators) == 0
+    converted = pe.Alpha.convert_all(values + values[::-1])
+    assert [str(a) for a in converted] == [e for *_, e in KNOWN] + [e for *_, e in KNOWN[::-1]]
+    assert converted[0] is not converted[-1]
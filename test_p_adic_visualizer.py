@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+import p_adic as pa
+import p_adic_IFS as pIFS
+import p_adic_visualizer as pv
+
+
+def _words(dfa, n: int) -> list[int]:
+    # The first digit read is the most significant in the position
+    frontier = [(next(iter(dfa.graph)), 0)]
+    for _ in range(n):
+        frontier = [(head, position * p + int(label)) for node, position in frontier for label, head in dfa.graph[node]]
+    return [position for _, position in frontier]
+
+
+p, n = 5, 6
+functions = [pIFS.pAdicFunction(p, '', pa.pAdic.to_p_adic(p, u, v), k, '+' if sign > 0 else '-') for u, v, k, sign in [(0, 1, 1, -1), (1, 2, 2, 1), (3, 7, 1, -1)]]
+
+
+@pytest.mark.parametrize('width_digits, block_cells', [(None, 1 << 22), (3, 125), (4, 625), (2, 30), (6, 5 ** 6), (None, 30)])
+def test_blocks_match_words(width_digits, block_cells):
+    dfa, _ = pv.attractor_dfa(functions)
+    expected = np.zeros(p ** n, dtype=np.uint8)
+    expected[_words(dfa, n)] = 1
+    blocks = list(pv.image_blocks(dfa, p, n, width_digits, block_cells))
+    image = np.concatenate([block for _, block in blocks])
+    assert [start for start, _ in blocks] == list(np.cumsum([0] + [len(block) for _, block in blocks[:-1]]))
+    assert image.shape[1] <= block_cells
+    assert np.array_equal(image.reshape(-1), expected)
+
+
+def test_explicit_width_must_fit_in_a_block():
+    dfa, _ = pv.attractor_dfa(functions)
+    with pytest.raises(AssertionError):
+        next(pv.image_blocks(dfa, p, n, 4, 124))
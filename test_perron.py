@@ -0,0 +1,78 @@
+import random
+from decimal import Decimal
+from fractions import Fraction
+
+import numpy as np
+
+import algebraic_extension as ae
+import p_adic as pa
+import p_adic_IFS as pIFS
+import perron
+import transducer_viewer as tv
+
+
+def _graph(arcs: list[tuple[int, int]], size: int) -> tv.MyGraph:
+    graph = tv.MyGraph()
+    for node in range(size):
+        graph.add_node(str(node))
+    for tail, head in arcs:
+        graph.add_edge(str(tail), str(head), '0')
+    return graph
+
+
+def _spectral_radius(graph: tv.MyGraph) -> float:
+    return max(abs(np.linalg.eigvals(graph.adjacency_matrix().astype(float))))
+
+
+def test_matches_eigvals_on_random_multigraphs(monkeypatch):
+    monkeypatch.setattr(perron, '_blocks', perron.OrderedDict())
+    rng = random.Random(1)
+    for _ in range(200):
+        size = rng.randint(1, 12)
+        graph = _graph([(rng.randrange(size), rng.randrange(size)) for _ in range(rng.randint(0, 3 * size))], size)
+        lower, upper = perron.perron_root(graph, 60)
+        assert upper - lower <= Fraction(1, 2 ** 60)
+        # Defective eigenvalues are only found to about the square root of float precision
+        assert float(lower) - 1e-6 <= _spectral_radius(graph) <= float(upper) + 1e-6
+
+
+def test_several_components():
+    # A golden ratio component reaches a 1 + sqrt(2) component, which reaches a single node with three loops
+    arcs = [(0, 0), (0, 1), (1, 0), (1, 2), (2, 2), (2, 2), (2, 3), (3, 2), (3, 4), (4, 4), (4, 4), (4, 4)]
+    lower, upper = perron.perron_root(_graph(arcs, 5), 80)
+    assert lower == upper == 3
+    lower, upper = perron.perron_root(_graph(arcs[:-3], 5), 80)
+    assert lower ** 2 - 2 * lower - 1 <= 0 <= upper ** 2 - 2 * upper - 1
+    assert upper - lower <= Fraction(1, 2 ** 80)
+
+
+def test_sturm_chain_of_repeated_roots():
+    # (x - 2)^2 (x + 1)
+    chain = perron.sturm_chain(ae.Polynomial(4, 0, -3, 1))
+    assert [perron.roots_above(chain, Fraction(x)) for x in (-2, 0, Fraction(3, 2), 2)] == [2, 1, 1, 0]
+
+
+def test_large_degree_falls_back_to_collatz_wielandt(monkeypatch):
+    monkeypatch.setattr(perron, '_blocks', perron.OrderedDict())
+    monkeypatch.setattr(perron._Block, '_MAX_DEGREE', 1)
+    graph = _graph([(0, 1), (1, 2), (2, 0), (0, 2), (2, 2), (1, 0)], 3)
+    lower, upper = perron.perron_root(graph)
+    assert lower <= Fraction(_spectral_radius(graph)) + Fraction(1, 2 ** 40) and Fraction(_spectral_radius(graph)) - Fraction(1, 2 ** 40) <= upper
+    assert upper - lower < Fraction(1, 2 ** 30)
+
+
+def test_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(perron, '_blocks', perron.OrderedDict())
+    monkeypatch.setattr(perron, '_BLOCKS_MAXSIZE', 2)
+    for loops in range(1, 5):
+        perron.perron_root(_graph([(0, 1), (1, 0)] + [(0, 0)] * loops, 2))
+    assert len(perron._blocks) == 2
+
+
+def test_certified_dimension():
+    p = 5
+    functions = [pIFS.pAdicFunction(p, 'A', pa.pAdic.from_rational(p, 0), 1, '-'), pIFS.pAdicFunction(p, 'B', pa.pAdic.from_rational(p, 1, 2), 2, '+')]
+    lower, upper = perron.certified_dimension(pIFS.Transducer(p, (pa.pAdic.zero(p), 1), *functions), 30)
+    # log(golden ratio) / log(5)
+    assert lower == Decimal('0.298993717832720074872513251024')
+    assert upper == Decimal('0.298993717832720074872513251025')
@@ -88,6 +88,12 @@ def view_transducer(transducer: pIFS.Transducer):
     return graph
 
 def make_ndfa(transducer: pIFS.Transducer, suppress_output=False) -> MyGraph:
+    graph, g = ndfa_graphs(transducer)
+    if not suppress_output:
+        print(graph.source)
+    return g
+
+def ndfa_graphs(transducer: pIFS.Transducer) -> tuple[Digraph, MyGraph]:
     counter = 0
     g = MyGraph()
     transducer.create_transducer()
@@ -99,9 +105,7 @@ def make_ndfa(transducer: pIFS.Transducer, suppress_output=False) -> MyGraph:
     for tail, transitions in transducer.states.items():
         for f, result in transitions.items():
             counter = ndfa_arcs(graph, node_name(tail), node_name(result[0]), result, counter, g)
-    if not suppress_output:
-        print(graph.source)
-    return g
+    return graph, g
 
 def make_dfa(transducer: pIFS.Transducer):
     inputs = list(map(str, range(transducer.p)))
@@ -139,7 +143,7 @@ def make_dfa(transducer: pIFS.Transducer):
         unexplored_states = unexplored_states[1:]
     return dfa
 
-def hausdorff_dimension(transducer: pIFS.Transducer):
-    adjacency_matrix = make_dfa(transducer).adjacency_matrix()
+def hausdorff_dimension(transducer: pIFS.Transducer, dfa: MyGraph | None = None):
+    adjacency_matrix = (dfa if dfa is not None else make_dfa(transducer)).adjacency_matrix()
     spectral_radius = max(map(np.abs, np.linalg.eig(adjacency_matrix)[0]))
     return np.log(spectral_radius)/np.log(transducer.p)